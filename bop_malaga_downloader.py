@@ -17,31 +17,176 @@ Date: 2025
 """
 
 import os
+import re
 import sys
+import gzip
 import time
 import json
+import shutil
+import socket
 import logging
 import hashlib
+import sqlite3
+import queue
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Set, Optional, Tuple
-import pytz
+from typing import Any, List, Dict, Set, Iterable, Optional, Tuple
 
 try:
-    from bs4 import BeautifulSoup
+    import orjson
 except ImportError:
-    print("Error: BeautifulSoup4 is required. Install with: pip install beautifulsoup4")
-    sys.exit(1)
+    orjson = None
+
+try:
+    import brotli  # noqa: F401 - lets urllib3 decode 'br' responses
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
 
 try:
-    from tracker import DocumentTracker
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+    
+    # Without lxml extraction falls back to BeautifulSoup, loaded on first use
+    import importlib.util
+    if importlib.util.find_spec('bs4') is None:
+        print("Error: lxml or BeautifulSoup4 is required. Install with: pip install lxml")
+        sys.exit(1)
+
+try:
+    from tracker import BOPMalagaTracker  # noqa: F401
 except ImportError:
     print("Error: tracker module is required. Ensure tracker.py is in the same directory.")
     sys.exit(1)
 
 
+# Edicto ID format YYYYMMDD-NNNNN-YYYY-NN, with year (2000-2030), month and
+# day ranges encoded directly so validation is a single match call
+_EDICTO_ID_RE = re.compile(
+    r'(?:20[0-2]\d|2030)(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])-\d+-\d+-\d+'
+)
+
+# Edicto ID from an edicto.php?edicto= or descarga.php?archivo= link, with
+# any .pdf extension left outside the group
+_HREF_RE = re.compile(r'(?:edicto=|archivo=)([^&]+?)(?:\.pdf)?(?:&|$)')
+
+# Characters that are unsafe in filenames, mapped to '_' in one translate pass
+_UNSAFE_FILENAME_TABLE = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+# Single C-level pass selecting both edicto page links and direct PDF links
+_EDICTO_LINK_XPATH = etree.XPath(
+    "//a[contains(@href, 'edicto.php?edicto=') or contains(@href, 'descarga.php?archivo=')]"
+) if lxml_html is not None else None
+
+# Parsed edictos buffered between the backfill summary parser and the
+# download dispatcher before the parser blocks
+_EDICTO_QUEUE_SIZE = 64
+
+
+def _load_json_file(path: str) -> Any:
+    """Parse a JSON file, using orjson's C parser when it is installed."""
+    if orjson is not None:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class _HashingWriter:
+    """File wrapper that feeds every written block into a SHA-256 digest."""
+    
+    def __init__(self, f):
+        """Wrap an open binary file."""
+        self._f = f
+        self.digest = hashlib.sha256()
+    
+    def write(self, data: bytes) -> int:
+        """Hash and write a block of data."""
+        self.digest.update(data)
+        return self._f.write(data)
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """File handler that fills a large write buffer instead of flushing per record.
+    
+    Records at ``flush_level`` or above are flushed immediately; the rest
+    reach the disk when the buffer fills or when logging shuts down at exit.
+    """
+    
+    def __init__(self, filename: str, buffer_size: int = 65536,
+                 flush_level: int = logging.WARNING, encoding: Optional[str] = None):
+        """Initialize the handler; the file is opened on the first record."""
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        super().__init__(filename, encoding=encoding, delay=True)
+    
+    def _open(self):
+        """Open the log file with the configured buffer size."""
+        return open(self.baseFilename, self.mode, buffering=self.buffer_size,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        """Write a record, flushing only for important levels."""
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= self.flush_level:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled sockets use a large receive buffer.
+    
+    A bigger SO_RCVBUF lets the TCP window open up within a single PDF
+    transfer; TCP_NODELAY is kept from urllib3's default socket options.
+    """
+    
+    def __init__(self, recv_buffer_size: int = 4 * 1024 * 1024, **kwargs):
+        """Initialize the adapter with the socket receive buffer size in bytes."""
+        self.socket_options = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_RCVBUF, recv_buffer_size),
+        ]
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        """Create the pool manager with the tuned socket options."""
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces request start times by a fixed interval."""
+    
+    def __init__(self, interval: float):
+        """Initialize the limiter with the minimum delay between requests."""
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_allowed = 0.0
+    
+    def acquire(self) -> None:
+        """Block until the caller is allowed to start the next request."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_allowed - now
+            self._next_allowed = max(now, self._next_allowed) + self.interval
+        
+        # Sleep outside the lock so other workers can reserve their slot
+        if wait > 0:
+            time.sleep(wait)
+
+
 class BOPMalagaDownloader:
     """Main class for downloading BOP Málaga PDF documents."""
     
@@ -50,15 +195,21 @@ class BOPMalagaDownloader:
         self.base_url = "https://www.bopmalaga.es"
         self.summary_url = f"{self.base_url}/sumario.php"
         self.download_url_template = f"{self.base_url}/descarga.php?archivo={{filename}}"
+        self._download_url_prefix = f"{self.base_url}/descarga.php?archivo="
+        self._url_prefixes = (f"{self.base_url}/", f"{self.base_url.replace('https://', 'http://', 1)}/")
         
         # Default configuration
         self.config = {
             'download_dir': './downloads',
             'logs_dir': './logs',
             'tracking_file': './tracking.json',
+            'cache_dir': './cache',  # Summary pages kept for conditional GETs
             'crawl_delay': 5.0,  # seconds, as per robots.txt
             'max_retries': 3,
             'timeout': 30,
+            'workers': 8,  # Concurrent download threads
+            'write_buffer_size': 1024 * 1024,  # Coalesce PDF writes into 1MB syscalls
+            'socket_recv_buffer': 4 * 1024 * 1024,  # SO_RCVBUF for pooled connections
             'user_agent': 'BOP-Malaga-Downloader/1.0 (Educational/Research Purpose)',
             'max_storage_mb': 1000,  # 1GB default
             'cleanup_days': 30,
@@ -66,6 +217,7 @@ class BOPMalagaDownloader:
             'compress_old_files': True,  # Enable compression
             'auto_cleanup': True,  # Enable automatic cleanup
             'storage_cleanup_threshold': 0.9,  # Cleanup when 90% of max storage is used
+            'strict_url_validation': False,  # Parse URLs fully instead of prefix check
             'log_level': 'INFO'
         }
         
@@ -85,13 +237,32 @@ class BOPMalagaDownloader:
             'User-Agent': self.config['user_agent'],
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
             'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
         
-        # Load tracking data
-        self.downloaded_edictos = self.load_tracking_data()
+        # Keep one pooled keep-alive connection per worker so concurrent
+        # downloads reuse TLS sessions instead of reconnecting. The pool
+        # does not block: a leaked connection costs an extra socket
+        # instead of stalling a worker forever
+        adapter = TunedHTTPAdapter(
+            recv_buffer_size=self.config['socket_recv_buffer'],
+            pool_connections=1,  # Only one host is ever contacted
+            pool_maxsize=self.config['workers'],
+            pool_block=False
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Shared rate limiter so concurrent workers still honor the crawl delay
+        self.rate_limiter = RateLimiter(self.config['crawl_delay'])
+        
+        # Guards tracking database and stats updates from worker threads
+        self._lock = threading.Lock()
+        
+        # Open tracking database
+        self.db = self.open_tracking_db()
         
         # Statistics
         self.stats = {
@@ -107,16 +278,16 @@ class BOPMalagaDownloader:
     def load_config(self, config_path: str) -> None:
         """Load configuration from JSON file."""
         try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                custom_config = json.load(f)
-                self.config.update(custom_config)
-            self.logger.info(f"Configuration loaded from {config_path}")
+            custom_config = _load_json_file(config_path)
+            self.config.update(custom_config)
+            self.logger.info("Configuration loaded from %s", config_path)
         except Exception as e:
             print(f"Warning: Could not load config from {config_path}: {e}")
     
     def setup_directories(self) -> None:
         """Create necessary directories."""
-        for dir_path in [self.config['download_dir'], self.config['logs_dir']]:
+        for dir_path in [self.config['download_dir'], self.config['logs_dir'],
+                         self.config['cache_dir']]:
             Path(dir_path).mkdir(parents=True, exist_ok=True)
     
     def setup_logging(self) -> None:
@@ -128,42 +299,62 @@ class BOPMalagaDownloader:
             level=getattr(logging, self.config['log_level'].upper()),
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
+                BufferedFileHandler(log_file, encoding='utf-8'),
                 logging.StreamHandler(sys.stdout)
             ]
         )
         
         self.logger = logging.getLogger('BOPMalagaDownloader')
     
-    def load_tracking_data(self) -> Set[str]:
-        """Load previously downloaded edicto IDs from tracking file."""
+    def open_tracking_db(self) -> sqlite3.Connection:
+        """Open the SQLite tracking store, importing legacy JSON tracking once."""
         tracking_file = self.config['tracking_file']
-        if os.path.exists(tracking_file):
+        db_path = os.path.splitext(tracking_file)[0] + '.db'
+        is_new = not os.path.exists(db_path)
+        
+        # Shared by worker threads; every access is serialized by self._lock
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        db.execute("CREATE TABLE IF NOT EXISTS done (id TEXT PRIMARY KEY)")
+        db.execute("CREATE TABLE IF NOT EXISTS content "
+                   "(id TEXT PRIMARY KEY, sha256 TEXT NOT NULL, path TEXT NOT NULL)")
+        db.execute("CREATE INDEX IF NOT EXISTS content_sha256 ON content (sha256)")
+        db.execute("CREATE TABLE IF NOT EXISTS summary_cache "
+                   "(day TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, html_path TEXT NOT NULL)")
+        
+        if is_new and os.path.exists(tracking_file):
             try:
-                with open(tracking_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return set(data.get('downloaded_edictos', []))
+                legacy_ids = _load_json_file(tracking_file).get('downloaded_edictos', [])
+                db.executemany("INSERT OR IGNORE INTO done (id) VALUES (?)",
+                               ((edicto_id,) for edicto_id in legacy_ids))
+                db.commit()
+                self.logger.info("Imported %d edictos from %s", len(legacy_ids), tracking_file)
             except Exception as e:
-                self.logger.warning(f"Could not load tracking data: {e}")
-        return set()
+                self.logger.warning("Could not import legacy tracking data: %s", e)
+        
+        self.logger.debug("Tracking database opened: %s", db_path)
+        return db
     
-    def save_tracking_data(self) -> None:
-        """Save downloaded edicto IDs to tracking file."""
-        tracking_file = self.config['tracking_file']
+    def commit_tracking_data(self) -> None:
+        """Commit edictos recorded since the last commit to the tracking database."""
         try:
-            data = {
-                'downloaded_edictos': list(self.downloaded_edictos),
-                'last_updated': datetime.now().isoformat(),
-                'total_downloads': len(self.downloaded_edictos)
-            }
-            with open(tracking_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            self.logger.debug(f"Tracking data saved to {tracking_file}")
+            with self._lock:
+                self.db.commit()
+            self.logger.debug("Tracking data committed")
         except Exception as e:
-            self.logger.error(f"Could not save tracking data: {e}")
+            self.logger.error("Could not save tracking data: %s", e)
+    
+    def is_downloaded(self, edicto_id: str) -> bool:
+        """Check whether an edicto is already recorded as downloaded."""
+        with self._lock:
+            row = self.db.execute("SELECT 1 FROM done WHERE id = ?", (edicto_id,)).fetchone()
+        return row is not None
     
     def validate_url(self, url: str) -> bool:
         """Validate URL format and domain."""
+        if not self.config['strict_url_validation']:
+            # Every valid URL starts with the site root, so skip urlparse
+            return len(url) < 2000 and url.startswith(self._url_prefixes)
+        
         try:
             parsed = urlparse(url)
             return (
@@ -177,9 +368,7 @@ class BOPMalagaDownloader:
     def sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for safe filesystem storage."""
         # Remove or replace unsafe characters
-        unsafe_chars = '<>:"/\\|?*'
-        for char in unsafe_chars:
-            filename = filename.replace(char, '_')
+        filename = filename.translate(_UNSAFE_FILENAME_TABLE)
         
         # Limit filename length
         if len(filename) > 255:
@@ -188,221 +377,436 @@ class BOPMalagaDownloader:
         
         return filename
     
-    def make_request(self, url: str, **kwargs) -> Optional[requests.Response]:
-        """Make HTTP request with error handling and rate limiting."""
+    def make_request(self, url: str, paced: bool = False, method: str = 'GET',
+                     **kwargs) -> Optional[requests.Response]:
+        """Make HTTP request with error handling and rate limiting.
+        
+        When ``paced`` is set the caller already holds a rate limiter slot
+        for the first attempt; retries always wait for a fresh slot.
+        """
         if not self.validate_url(url):
-            self.logger.error(f"Invalid URL: {url}")
+            self.logger.error("Invalid URL: %s", url)
             return None
         
         for attempt in range(self.config['max_retries']):
             try:
-                # Respect crawl delay
-                time.sleep(self.config['crawl_delay'])
+                # Respect crawl delay across all workers
+                if attempt > 0 or not paced:
+                    self.rate_limiter.acquire()
                 
-                response = self.session.get(
+                response = self.session.request(
+                    method,
                     url,
                     timeout=self.config['timeout'],
                     **kwargs
                 )
                 
-                if response.status_code == 200:
+                if response.status_code in (200, 206):
+                    return response
+                elif response.status_code == 304:
+                    # Not modified; only returned for conditional requests
                     return response
-                elif response.status_code == 404:
-                    self.logger.warning(f"Resource not found (404): {url}")
+                
+                # Release the pooled connection of a response we won't return
+                response.close()
+                if response.status_code == 404:
+                    self.logger.warning("Resource not found (404): %s", url)
                     return None
-                else:
-                    self.logger.warning(f"HTTP {response.status_code} for {url}")
+                self.logger.warning("HTTP %d for %s", response.status_code, url)
                     
             except requests.exceptions.RequestException as e:
-                self.logger.warning(f"Request attempt {attempt + 1} failed for {url}: {e}")
+                self.logger.warning("Request attempt %d failed for %s: %s", attempt + 1, url, e)
                 if attempt < self.config['max_retries'] - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
         
-        self.logger.error(f"All request attempts failed for {url}")
+        self.logger.error("All request attempts failed for %s", url)
         return None
     
+    def _find_edicto_anchors(self, html_content: str) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Return (href, title) pairs for edicto page links and direct PDF links."""
+        if lxml_html is not None:
+            root = lxml_html.fromstring(html_content)
+            anchors = [
+                (a.get('href'), a.text_content().strip() or "Unknown")
+                for a in _EDICTO_LINK_XPATH(root)
+            ]
+        else:
+            from bs4 import BeautifulSoup
+            
+            soup = BeautifulSoup(html_content, 'html.parser')
+            anchors = [
+                (a.get('href'), a.get_text(strip=True) or "Unknown")
+                for a in soup.find_all('a', href=True)
+                if 'edicto.php?edicto=' in a['href'] or 'descarga.php?archivo=' in a['href']
+            ]
+        
+        edicto_links = [a for a in anchors if 'edicto.php?edicto=' in a[0]]
+        pdf_links = [a for a in anchors if 'descarga.php?archivo=' in a[0]]
+        return edicto_links, pdf_links
+    
     def extract_edicto_links(self, html_content: str) -> List[Dict[str, str]]:
         """Extract edicto information from HTML content."""
-        edictos = []
-        
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
             # Look for edicto links - based on the pattern observed
             # Links typically have format: edicto.php?edicto=YYYYMMDD-NNNNN-YYYY-NN
-            edicto_links = soup.find_all('a', href=lambda x: x and 'edicto.php?edicto=' in x)
+            edicto_links, pdf_links = self._find_edicto_anchors(html_content)
             
-            for link in edicto_links:
-                href = link.get('href')
-                if not href:
-                    continue
-                
-                # Extract edicto ID from URL
-                if 'edicto=' in href:
-                    edicto_id = href.split('edicto=')[1].split('&')[0]
-                    
-                    # Validate edicto ID format (YYYYMMDD-NNNNN-YYYY-NN)
-                    if self.validate_edicto_id(edicto_id):
-                        # Generate PDF filename
-                        pdf_filename = f"{edicto_id}.pdf"
-                        pdf_url = self.download_url_template.format(filename=pdf_filename)
-                        
-                        # Extract title/description if available
-                        title = link.get_text(strip=True) or "Unknown"
-                        
-                        edictos.append({
-                            'id': edicto_id,
-                            'title': title,
-                            'pdf_url': pdf_url,
-                            'pdf_filename': pdf_filename
-                        })
+            # Extract edicto IDs from URLs
+            candidates = [
+                (match.group(1), title)
+                for match, title in ((_HREF_RE.search(href), title) for href, title in edicto_links)
+                if match
+            ]
             
-            # Also look for direct PDF download links
-            pdf_links = soup.find_all('a', href=lambda x: x and 'descarga.php?archivo=' in x)
+            # Validate edicto ID format (YYYYMMDD-NNNNN-YYYY-NN), first title wins
+            title_by_id: Dict[str, str] = {}
+            for edicto_id, title in candidates:
+                if self.validate_edicto_id(edicto_id):
+                    title_by_id.setdefault(edicto_id, title)
+            
+            # Generate PDF filenames and URLs for all valid IDs in one pass
+            edictos = {
+                edicto_id: {
+                    'id': edicto_id,
+                    'title': title,
+                    'pdf_url': f"{self._download_url_prefix}{edicto_id}.pdf",
+                    'pdf_filename': f"{edicto_id}.pdf"
+                }
+                for edicto_id, title in title_by_id.items()
+            }
             
-            for link in pdf_links:
-                href = link.get('href')
-                if not href:
+            # Also look for direct PDF download links
+            for href, title in pdf_links:
+                # Extract edicto ID from the filename, without its .pdf extension
+                match = _HREF_RE.search(href)
+                if not match:
                     continue
                 
-                # Extract filename from URL
-                if 'archivo=' in href:
-                    filename = href.split('archivo=')[1].split('&')[0]
-                    
-                    # Extract edicto ID from filename (remove .pdf extension)
-                    edicto_id = filename.replace('.pdf', '')
-                    
-                    if self.validate_edicto_id(edicto_id):
-                        full_url = urljoin(self.base_url, href)
-                        title = link.get_text(strip=True) or "Unknown"
-                        
-                        # Avoid duplicates
-                        if not any(e['id'] == edicto_id for e in edictos):
-                            edictos.append({
-                                'id': edicto_id,
-                                'title': title,
-                                'pdf_url': full_url,
-                                'pdf_filename': filename
-                            })
+                edicto_id = match.group(1)
+                
+                # Avoid duplicates
+                if edicto_id not in edictos and self.validate_edicto_id(edicto_id):
+                    edictos[edicto_id] = {
+                        'id': edicto_id,
+                        'title': title,
+                        'pdf_url': urljoin(self.base_url, href),
+                        'pdf_filename': f"{edicto_id}.pdf"
+                    }
             
-            self.logger.info(f"Extracted {len(edictos)} edicto links from HTML")
-            return edictos
+            self.logger.info("Extracted %d edicto links from HTML", len(edictos))
+            return list(edictos.values())
             
         except Exception as e:
-            self.logger.error(f"Error extracting edicto links: {e}")
+            self.logger.error("Error extracting edicto links: %s", e)
             return []
     
     def validate_edicto_id(self, edicto_id: str) -> bool:
         """Validate edicto ID format: YYYYMMDD-NNNNN-YYYY-NN"""
-        try:
-            parts = edicto_id.split('-')
-            if len(parts) != 4:
-                return False
-            
-            # Check date part (YYYYMMDD)
-            date_part = parts[0]
-            if len(date_part) != 8 or not date_part.isdigit():
-                return False
-            
-            # Validate date
-            year = int(date_part[:4])
-            month = int(date_part[4:6])
-            day = int(date_part[6:8])
-            
-            if not (2000 <= year <= 2030 and 1 <= month <= 12 and 1 <= day <= 31):
-                return False
-            
-            # Check other parts are numeric
-            if not (parts[1].isdigit() and parts[2].isdigit() and parts[3].isdigit()):
-                return False
-            
+        return _EDICTO_ID_RE.fullmatch(edicto_id) is not None
+    
+    def _increment_stat(self, key: str) -> None:
+        """Increment a statistics counter from any worker thread."""
+        with self._lock:
+            self.stats[key] += 1
+    
+    def _mark_downloaded(self, edicto_id: str) -> None:
+        """Record an edicto as downloaded from any worker thread."""
+        with self._lock:
+            self.db.execute("INSERT OR IGNORE INTO done (id) VALUES (?)", (edicto_id,))
+    
+    def _skip_if_present(self, edicto: Dict[str, str]) -> bool:
+        """Return True (and count a skip) if the edicto needs no download."""
+        edicto_id = edicto['id']
+        
+        # Check if already downloaded
+        if self.is_downloaded(edicto_id):
+            self.logger.debug("Skipping already downloaded edicto: %s", edicto_id)
+            self._increment_stat('skipped')
             return True
-            
-        except (ValueError, IndexError):
-            return False
+        
+        # Check if file already exists
+        safe_filename = self.sanitize_filename(edicto['pdf_filename'])
+        if os.path.exists(os.path.join(self.config['download_dir'], safe_filename)):
+            self.logger.info("File already exists: %s", safe_filename)
+            self._mark_downloaded(edicto_id)
+            self._increment_stat('skipped')
+            return True
+        
+        return False
     
-    def download_pdf(self, edicto: Dict[str, str]) -> bool:
-        """Download a single PDF file."""
+    def download_pdf(self, edicto: Dict[str, str], paced: bool = False,
+                     checked: bool = False) -> bool:
+        """Download a single PDF file.
+        
+        Set ``paced`` when the caller has already waited on the rate limiter
+        for the first request of this download, and ``checked`` when it has
+        already run the skip check for this edicto.
+        """
         edicto_id = edicto['id']
         pdf_url = edicto['pdf_url']
         filename = edicto['pdf_filename']
         
-        # Check if already downloaded
-        if edicto_id in self.downloaded_edictos:
-            self.logger.debug(f"Skipping already downloaded edicto: {edicto_id}")
-            self.stats['skipped'] += 1
+        if not checked and self._skip_if_present(edicto):
             return True
         
         # Sanitize filename
         safe_filename = self.sanitize_filename(filename)
         file_path = os.path.join(self.config['download_dir'], safe_filename)
-        
-        # Check if file already exists
-        if os.path.exists(file_path):
-            self.logger.info(f"File already exists: {safe_filename}")
-            self.downloaded_edictos.add(edicto_id)
-            self.stats['skipped'] += 1
-            return True
+        part_path = f"{file_path}.part"
+        response = None
         
         try:
-            self.logger.info(f"Downloading: {edicto_id} -> {safe_filename}")
+            self.logger.info("Downloading: %s -> %s", edicto_id, safe_filename)
             
-            response = self.make_request(pdf_url, stream=True)
+            # PDFs are already compressed; ask for the raw bytes
+            headers = {'Accept-Encoding': 'identity'}
+            
+            # Resume a partial file left behind by an earlier failed attempt
+            offset = 0
+            if os.path.exists(part_path) and os.path.getsize(part_path) > 0:
+                offset = self._resume_offset(pdf_url, part_path, paced)
+                paced = False  # The HEAD request used the caller's slot
+                if offset:
+                    headers['Range'] = f"bytes={offset}-"
+            
+            response = self.make_request(pdf_url, paced=paced, stream=True, headers=headers)
             if not response:
-                self.stats['errors'] += 1
+                self._increment_stat('errors')
                 return False
             
+            # Start over if the server ignored the range request
+            if offset and response.status_code != 206:
+                offset = 0
+            
             # Check content type
             content_type = response.headers.get('content-type', '').lower()
             if 'pdf' not in content_type and 'application/octet-stream' not in content_type:
-                self.logger.warning(f"Unexpected content type for {edicto_id}: {content_type}")
+                self.logger.warning("Unexpected content type for %s: %s", edicto_id, content_type)
+            
+            # Download file; the large buffer batches chunks into few write syscalls
+            content_length = int(response.headers.get('content-length') or 0)
+            # Only run the urllib3 decoder if the server encoded the body anyway
+            encoded = 'content-encoding' in response.headers
+            response.raw.decode_content = encoded
+            # Resumes reopen the partial file and continue at the offset
+            with open(part_path, 'r+b' if offset else 'wb',
+                      buffering=self.config['write_buffer_size']) as f:
+                writer = _HashingWriter(f)
+                
+                # Bring the digest up to date with the bytes already on disk
+                if offset:
+                    for block in iter(lambda: f.read(1024 * 1024), b''):
+                        writer.digest.update(block)
+                    f.seek(offset)
+                
+                # Copy in C with 256KB reads instead of a Python chunk loop,
+                # hashing the content on the way through. The file is not
+                # preallocated: its size is the next resume offset, so it must
+                # only hold bytes received even if the process is killed
+                try:
+                    shutil.copyfileobj(response.raw, writer, length=256 * 1024)
+                finally:
+                    # Drop anything past the last byte written, such as stale
+                    # bytes from an earlier attempt, even when the copy fails
+                    f.flush()
+                    f.truncate(f.tell())
+            
+            size = os.path.getsize(part_path) if os.path.exists(part_path) else 0
             
-            # Download file
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+            # A short body leaves the partial file in place for the next resume
+            if content_length and not encoded and size != offset + content_length:
+                self.logger.error("Incomplete download for %s: %d of %d bytes",
+                                  edicto_id, size, offset + content_length)
+                self._increment_stat('errors')
+                return False
             
             # Verify file was downloaded
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                self.logger.info(f"Successfully downloaded: {safe_filename} ({os.path.getsize(file_path)} bytes)")
-                self.downloaded_edictos.add(edicto_id)
-                self.stats['downloaded'] += 1
+            if size > 0:
+                self._store_unique(edicto_id, part_path, file_path, writer.digest.hexdigest())
+                self.logger.info("Successfully downloaded: %s (%d bytes)", safe_filename, size)
+                self._mark_downloaded(edicto_id)
+                self._increment_stat('downloaded')
                 return True
             else:
-                self.logger.error(f"Downloaded file is empty or missing: {safe_filename}")
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                self.stats['errors'] += 1
+                self.logger.error("Downloaded file is empty or missing: %s", safe_filename)
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                self._increment_stat('errors')
                 return False
                 
         except Exception as e:
-            self.logger.error(f"Error downloading {edicto_id}: {e}")
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-            self.stats['errors'] += 1
+            # Keep whatever arrived so the next attempt can resume it
+            self.logger.error("Error downloading %s: %s", edicto_id, e)
+            self._increment_stat('errors')
             return False
+        finally:
+            # Hand the streamed connection back to the pool on every path
+            if response is not None:
+                response.close()
+    
+    def _resume_offset(self, url: str, part_path: str, paced: bool) -> int:
+        """Return how many bytes of a partial download the server lets us resume."""
+        size = os.path.getsize(part_path)
+        response = self.make_request(url, paced=paced, method='HEAD',
+                                     headers={'Accept-Encoding': 'identity'})
+        if not response:
+            return 0
+        
+        expected = int(response.headers.get('content-length') or 0)
+        if response.headers.get('accept-ranges', '').lower() != 'bytes' or not size < expected:
+            return 0
+        
+        self.logger.info("Resuming %s from byte %d of %d", os.path.basename(part_path), size, expected)
+        return size
+    
+    def _store_unique(self, edicto_id: str, part_path: str, file_path: str, sha256: str) -> bool:
+        """Move a finished download into place, hardlinking repeated content.
+        
+        Returns True when the content matched an earlier download and the
+        new file was linked to that copy instead of stored again.
+        """
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT path FROM content WHERE sha256 = ?", (sha256,)
+            ).fetchall()
+        canonical = next((path for (path,) in rows if os.path.exists(path)), None)
+        
+        linked = False
+        if canonical:
+            try:
+                os.link(canonical, file_path)
+                os.remove(part_path)
+                linked = True
+                self.logger.info("Duplicate content for %s: linked to %s", edicto_id, canonical)
+            except OSError as e:
+                self.logger.debug("Could not hardlink %s to %s: %s", file_path, canonical, e)
+        
+        if not linked:
+            os.replace(part_path, file_path)
+        
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO content (id, sha256, path) VALUES (?, ?, ?)",
+                (edicto_id, sha256, file_path)
+            )
+        return linked
+    
+    def _paced_download(self, edicto: Dict[str, str],
+                        slots: threading.BoundedSemaphore) -> bool:
+        """Worker entry point: download a checked edicto and free its in-flight slot."""
+        try:
+            return self.download_pdf(edicto, paced=True, checked=True)
+        finally:
+            slots.release()
+    
+    def download_all(self, edictos: Iterable[Dict[str, str]]) -> None:
+        """Download edictos concurrently, pacing requests from this thread.
+        
+        The dispatching thread waits out the crawl delay before handing each
+        edicto to the pool, so worker threads only block on network I/O and
+        a bounded semaphore caps the number of downloads in flight.
+        """
+        workers = self.config['workers']
+        slots = threading.BoundedSemaphore(workers)
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for edicto in edictos:
+                self._increment_stat('processed')
+                
+                # Skips need no request, so they must not consume a slot
+                if self._skip_if_present(edicto):
+                    continue
+                
+                slots.acquire()
+                self.rate_limiter.acquire()
+                executor.submit(self._paced_download, edicto, slots)
     
     def fetch_daily_summary(self, date: Optional[datetime] = None) -> Optional[str]:
-        """Fetch daily summary HTML from BOP Málaga website."""
+        """Fetch daily summary HTML from BOP Málaga website.
+        
+        Summaries are cached on disk along with their ETag/Last-Modified
+        validators, so re-fetching an unchanged day costs a 304 response
+        instead of the full page.
+        """
         if date:
             # Format date for URL parameter
             date_str = date.strftime('%Y-%m-%d')
             url = f"{self.summary_url}?fecha={date_str}"
         else:
+            date_str = 'latest'
             url = self.summary_url
         
-        self.logger.info(f"Fetching daily summary from: {url}")
+        self.logger.info("Fetching daily summary from: %s", url)
         
-        response = self.make_request(url)
-        if response:
-            return response.text
-        else:
-            self.logger.error(f"Failed to fetch daily summary from {url}")
+        # Send validators only if the cached page is still on disk
+        with self._lock:
+            cached = self.db.execute(
+                "SELECT etag, last_modified, html_path FROM summary_cache WHERE day = ?",
+                (date_str,)
+            ).fetchone()
+        headers = {}
+        if cached and os.path.exists(cached[2]):
+            etag, last_modified, html_path = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        response = self.make_request(url, headers=headers)
+        if not response:
+            self.logger.error("Failed to fetch daily summary from %s", url)
             return None
+        
+        if response.status_code == 304 and headers:
+            self.logger.info("Daily summary not modified, using cached copy: %s", html_path)
+            with gzip.open(html_path, 'rt', encoding='utf-8') as f:
+                return f.read()
+        
+        html_content = response.text
+        self._cache_summary(date_str, response, html_content)
+        return html_content
+    
+    def _cache_summary(self, date_str: str, response: requests.Response, html_content: str) -> None:
+        """Store a summary page and its validators for later conditional GETs."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        
+        html_path = os.path.join(self.config['cache_dir'], f"summary-{date_str}.html.gz")
+        try:
+            with gzip.open(html_path, 'wt', encoding='utf-8') as f:
+                f.write(html_content)
+            with self._lock:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO summary_cache (day, etag, last_modified, html_path) "
+                    "VALUES (?, ?, ?, ?)",
+                    (date_str, etag, last_modified, html_path)
+                )
+            self.logger.debug("Cached daily summary: %s", html_path)
+        except Exception as e:
+            self.logger.warning("Could not cache daily summary %s: %s", date_str, e)
+    
+    def _process_edictos(self, edictos: Iterable[Dict[str, str]]) -> Dict[str, int]:
+        """Download a stream of edictos and log the final statistics."""
+        # Download PDFs concurrently; the rate limiter spaces out requests
+        self.download_all(edictos)
+        
+        # Log final statistics
+        duration = datetime.now() - self.stats['start_time']
+        self.logger.info("Download process completed in %s", duration)
+        self.logger.info("Statistics: %s", self.stats)
+        
+        return self.stats
+    
+    def _close(self) -> None:
+        """Persist tracking and release network resources after a run."""
+        # Persist tracking even if the run failed part-way
+        self.commit_tracking_data()
+        
+        # Cleanup
+        if hasattr(self, 'session'):
+            self.session.close()
     
     def run(self, date: Optional[datetime] = None) -> Dict[str, int]:
         """Main execution method."""
@@ -421,33 +825,78 @@ class BOPMalagaDownloader:
                 self.logger.info("No edictos found in daily summary")
                 return self.stats
             
-            self.logger.info(f"Found {len(edictos)} edictos to process")
+            self.logger.info("Found %d edictos to process", len(edictos))
+            return self._process_edictos(edictos)
             
-            # Download PDFs
-            for edicto in edictos:
-                self.stats['processed'] += 1
-                self.download_pdf(edicto)
+        except Exception as e:
+            self.logger.error("Unexpected error in main execution: %s", e)
+            self.stats['errors'] += 1
+            return self.stats
+        
+        finally:
+            self._close()
+    
+    def _produce_edictos(self, dates: List[datetime], edicto_queue: queue.Queue) -> None:
+        """Fetch and parse daily summaries, feeding new edictos to the queue.
+        
+        Runs on its own thread; a None item marks the end of the stream.
+        """
+        seen: Set[str] = set()
+        
+        try:
+            # Summaries arrive in date order as soon as each fetch completes
+            with ThreadPoolExecutor(max_workers=self.config['workers']) as executor:
+                for date, html_content in zip(dates, executor.map(self.fetch_daily_summary, dates)):
+                    if not html_content:
+                        self.logger.error("Could not fetch daily summary for %s", date.date())
+                        continue
+                    
+                    # Keep the first occurrence of each ID across days
+                    for edicto in self.extract_edicto_links(html_content):
+                        if edicto['id'] not in seen:
+                            seen.add(edicto['id'])
+                            edicto_queue.put(edicto)
+                            
+        except Exception as e:
+            self.logger.error("Error fetching backfill summaries: %s", e)
+            self._increment_stat('errors')
+        
+        finally:
+            edicto_queue.put(None)
+    
+    def run_range(self, start: datetime, end: datetime) -> Dict[str, int]:
+        """Backfill every daily summary from start to end (inclusive).
+        
+        Summary pages are fetched and parsed on a producer thread that feeds
+        a bounded queue, so the first PDFs are downloading while later days
+        are still being fetched, and all days share one download pass.
+        """
+        dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        self.logger.info("Starting BOP Málaga backfill for %d days (%s to %s)",
+                         len(dates), start.date(), end.date())
+        
+        try:
+            edicto_queue: queue.Queue = queue.Queue(maxsize=_EDICTO_QUEUE_SIZE)
+            producer = threading.Thread(target=self._produce_edictos,
+                                        args=(dates, edicto_queue), daemon=True)
+            producer.start()
             
-            # Save tracking data
-            self.save_tracking_data()
+            # Download edictos as the producer hands them over
+            self._process_edictos(iter(edicto_queue.get, None))
+            producer.join()
             
-            # Log final statistics
-            duration = datetime.now() - self.stats['start_time']
-            self.logger.info(f"Download process completed in {duration}")
-            self.logger.info(f"Statistics: {self.stats}")
+            if not self.stats['processed']:
+                self.logger.info("No edictos found in backfill range")
             
             return self.stats
             
         except Exception as e:
-            self.logger.error(f"Unexpected error in main execution: {e}")
+            self.logger.error("Unexpected error in backfill execution: %s", e)
             self.stats['errors'] += 1
             return self.stats
         
         finally:
-            # Cleanup
-            if hasattr(self, 'session'):
-                self.session.close()
-
+            self._close()
 
 def main():
     """Main entry point."""
@@ -456,6 +905,10 @@ def main():
     parser = argparse.ArgumentParser(description='BOP Málaga PDF Downloader')
     parser.add_argument('--config', help='Path to configuration file')
     parser.add_argument('--date', help='Specific date to download (YYYY-MM-DD format)')
+    parser.add_argument('--end-date',
+                        help='Backfill every day from --date through this date (YYYY-MM-DD format)')
+    parser.add_argument('--strict-urls', action='store_true',
+                        help='Validate URLs with a full parse instead of a prefix check')
     parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
     
     args = parser.parse_args()
@@ -469,16 +922,33 @@ def main():
             print(f"Error: Invalid date format '{args.date}'. Use YYYY-MM-DD format.")
             sys.exit(1)
     
+    end_date = None
+    if args.end_date:
+        try:
+            end_date = datetime.strptime(args.end_date, '%Y-%m-%d')
+        except ValueError:
+            print(f"Error: Invalid date format '{args.end_date}'. Use YYYY-MM-DD format.")
+            sys.exit(1)
+        if target_date is None or end_date < target_date:
+            print("Error: --end-date requires a --date on or before it.")
+            sys.exit(1)
+    
     # Initialize downloader
     try:
         downloader = BOPMalagaDownloader(config_path=args.config)
         
+        if args.strict_urls:
+            downloader.config['strict_url_validation'] = True
+        
         if args.verbose:
             downloader.config['log_level'] = 'DEBUG'
             downloader.setup_logging()
         
         # Run download process
-        stats = downloader.run(date=target_date)
+        if end_date:
+            stats = downloader.run_range(target_date, end_date)
+        else:
+            stats = downloader.run(date=target_date)
         
         # Exit with appropriate code
         if stats['errors'] > 0:
@@ -18,14 +18,158 @@ Date: 2025
 """
 
 import os
+import sys
+import copy
 import json
+import types
 import logging
-from pathlib import Path
-from typing import Dict, Any, Optional, Union
-from dataclasses import dataclass, asdict
+import functools
+from typing import Dict, Any, Optional
+from dataclasses import dataclass, field, fields, make_dataclass
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-@dataclass
+# Module logger, resolved once and reused by every config message
+_LOG = logging.getLogger(__name__)
+
+
+# Configuration sections, named the same in files and as attributes
+_SECTIONS = ('download', 'network', 'logging', 'email', 'tracking')
+
+# Environment values accepted as true for boolean settings
+_BOOL_TRUE = frozenset(('true', '1', 'yes', 'on'))
+
+
+def _parse_bool(value: str) -> bool:
+    """Convert an environment flag such as 'yes' or '0' to a bool."""
+    return value.lower() in _BOOL_TRUE
+
+
+def _parse_list(value: str) -> list:
+    """Convert a comma-separated environment value to a list of strings."""
+    return [item.strip() for item in value.split(',')]
+
+
+# Environment variable -> (section, attribute, converter)
+_ENV_MAPPINGS: Dict[str, tuple] = {
+    # Download settings
+    'BOP_DOWNLOAD_DIR': ('download', 'download_dir', str),
+    'BOP_MAX_STORAGE_MB': ('download', 'max_storage_mb', int),
+    'BOP_CLEANUP_DAYS': ('download', 'cleanup_days', int),
+    'BOP_COMPRESS_OLD_FILES': ('download', 'compress_old_files', _parse_bool),
+
+    # Network settings
+    'BOP_CRAWL_DELAY': ('network', 'crawl_delay', float),
+    'BOP_MAX_RETRIES': ('network', 'max_retries', int),
+    'BOP_TIMEOUT': ('network', 'timeout', int),
+    'BOP_USER_AGENT': ('network', 'user_agent', str),
+
+    # Logging settings
+    'BOP_LOGS_DIR': ('logging', 'logs_dir', str),
+    'BOP_LOG_LEVEL': ('logging', 'log_level', str),
+    'BOP_LOG_FILE': ('logging', 'log_file', str),
+    'BOP_MAX_LOG_SIZE_MB': ('logging', 'max_log_size_mb', int),
+
+    # Email settings
+    'BOP_EMAIL_ENABLED': ('email', 'enabled', _parse_bool),
+    'BOP_SMTP_SERVER': ('email', 'smtp_server', str),
+    'BOP_SMTP_PORT': ('email', 'smtp_port', int),
+    'BOP_EMAIL_USERNAME': ('email', 'username', str),
+    'BOP_EMAIL_PASSWORD': ('email', 'password', str),
+    'BOP_FROM_EMAIL': ('email', 'from_email', str),
+    'BOP_TO_EMAILS': ('email', 'to_emails', _parse_list),
+
+    # Tracking settings
+    'BOP_TRACKING_FILE': ('tracking', 'tracking_file', str),
+    'BOP_BACKUP_TRACKING': ('tracking', 'backup_tracking', _parse_bool),
+}
+
+# Accepted logging levels, stored upper-case
+_VALID_LEVELS = frozenset(('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'))
+
+# Constraints of every section, checked in one pass over to_dict() output
+_CONFIG_SCHEMA: Dict[str, Any] = {
+    'type': 'object',
+    'properties': {
+        'download': {
+            'type': 'object',
+            'properties': {
+                'max_storage_mb': {'type': 'number', 'exclusiveMinimum': 0},
+                'cleanup_days': {'type': 'number', 'exclusiveMinimum': 0},
+                'compression_days': {'type': 'number', 'minimum': 0},
+            },
+        },
+        'network': {
+            'type': 'object',
+            'properties': {
+                'crawl_delay': {'type': 'number', 'minimum': 0},
+                'max_retries': {'type': 'number', 'minimum': 0},
+                'timeout': {'type': 'number', 'exclusiveMinimum': 0},
+            },
+        },
+        'logging': {
+            'type': 'object',
+            'properties': {
+                'log_level': {
+                    'type': 'string',
+                    'pattern': '(?i)^(DEBUG|INFO|WARNING|ERROR|CRITICAL)$',
+                },
+                'max_log_size_mb': {'type': 'number', 'exclusiveMinimum': 0},
+                'backup_count': {'type': 'number', 'minimum': 0},
+            },
+        },
+        'email': {
+            'type': 'object',
+            'properties': {
+                'smtp_port': {'type': 'integer', 'minimum': 1, 'maximum': 65535},
+            },
+            # Enabled notifications need a server, a username and a sender
+            'if': {'properties': {'enabled': {'const': True}}},
+            'then': {
+                'properties': {
+                    'smtp_server': {'minLength': 1},
+                    'username': {'minLength': 1},
+                    'from_email': {'minLength': 1},
+                },
+            },
+        },
+        'tracking': {
+            'type': 'object',
+            'properties': {
+                'tracking_backup_days': {'type': 'number', 'minimum': 0},
+            },
+        },
+    },
+}
+
+@functools.lru_cache(maxsize=None)
+def _get_validator():
+    """Import jsonschema and compile the schema on first use; None if missing."""
+    try:
+        import jsonschema
+    except ImportError:
+        return None
+    return jsonschema.Draft202012Validator(_CONFIG_SCHEMA)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config_file(config_file: str, mtime_ns: int) -> types.MappingProxyType:
+    """Parse a JSON config file, cached until its modification time changes."""
+    if orjson is not None:
+        with open(config_file, 'rb') as f:
+            config_data = orjson.loads(f.read())
+    else:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config_data = json.load(f)
+    
+    # Read-only view so cached data cannot be changed by callers
+    return types.MappingProxyType(config_data)
+
+
+@dataclass(slots=True)
 class DownloadConfig:
     """Configuration for download behavior."""
     download_dir: str = './downloads'
@@ -44,7 +188,7 @@ class DownloadConfig:
             raise ValueError("compression_days must be non-negative")
 
 
-@dataclass
+@dataclass(slots=True)
 class NetworkConfig:
     """Configuration for network requests."""
     crawl_delay: float = 5.0  # seconds, as per robots.txt
@@ -62,7 +206,7 @@ class NetworkConfig:
             raise ValueError("timeout must be positive")
 
 
-@dataclass
+@dataclass(slots=True)
 class LoggingConfig:
     """Configuration for logging system."""
     logs_dir: str = './logs'
@@ -74,16 +218,17 @@ class LoggingConfig:
     
     def __post_init__(self):
         """Validate logging configuration."""
-        valid_levels = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
-        if self.log_level.upper() not in valid_levels:
-            raise ValueError(f"log_level must be one of {valid_levels}")
+        level = sys.intern(self.log_level.upper())
+        if level not in _VALID_LEVELS:
+            raise ValueError(f"log_level must be one of {sorted(_VALID_LEVELS)}")
+        self.log_level = level
         if self.max_log_size_mb <= 0:
             raise ValueError("max_log_size_mb must be positive")
         if self.backup_count < 0:
             raise ValueError("backup_count must be non-negative")
 
 
-@dataclass
+@dataclass(slots=True)
 class EmailConfig:
     """Configuration for email notifications."""
     enabled: bool = False
@@ -92,20 +237,18 @@ class EmailConfig:
     username: str = ''
     password: str = ''
     from_email: str = ''
-    to_emails: list = None
+    to_emails: list = field(default_factory=list)
     use_tls: bool = True
     
     def __post_init__(self):
         """Validate email configuration."""
-        if self.to_emails is None:
-            self.to_emails = []
         if self.enabled and not all([self.smtp_server, self.username, self.from_email]):
             raise ValueError("Email enabled but missing required settings")
         if self.smtp_port <= 0 or self.smtp_port > 65535:
             raise ValueError("smtp_port must be between 1 and 65535")
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackingConfig:
     """Configuration for tracking system."""
     tracking_file: str = './tracking.json'
@@ -118,11 +261,70 @@ class TrackingConfig:
             raise ValueError("tracking_backup_days must be non-negative")
 
 
+# Settable keys of each configuration section
+_FIELDS: Dict[type, frozenset] = {
+    cls: frozenset(f.name for f in fields(cls))
+    for cls in (DownloadConfig, NetworkConfig, LoggingConfig, EmailConfig, TrackingConfig)
+}
+
+
+# Field names of each section in declaration order
+_SHALLOW_FIELDS: Dict[type, tuple] = {
+    cls: tuple(f.name for f in fields(cls))
+    for cls in (DownloadConfig, NetworkConfig, LoggingConfig, EmailConfig, TrackingConfig)
+}
+
+
+def _shallow_dict(obj: Any) -> Dict[str, Any]:
+    """Map a flat section dataclass's field names to its current values."""
+    return {name: getattr(obj, name) for name in _SHALLOW_FIELDS[type(obj)]}
+
+
+def _frozen_variant(cls: type) -> type:
+    """Build a frozen, hashable twin of a section dataclass with the same fields."""
+    frozen_cls = make_dataclass(
+        f"Frozen{cls.__name__}",
+        [(f.name, f.type) for f in fields(cls)],
+        frozen=True,
+        slots=True,
+    )
+    frozen_cls.__module__ = __name__
+    frozen_cls.__doc__ = f"Read-only snapshot of {cls.__name__}."
+    return frozen_cls
+
+
+FrozenDownloadConfig = _frozen_variant(DownloadConfig)
+FrozenNetworkConfig = _frozen_variant(NetworkConfig)
+FrozenLoggingConfig = _frozen_variant(LoggingConfig)
+FrozenEmailConfig = _frozen_variant(EmailConfig)
+FrozenTrackingConfig = _frozen_variant(TrackingConfig)
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenBOPMalagaConfig:
+    """Read-only, hashable snapshot of a BOPMalagaConfig."""
+    download: FrozenDownloadConfig
+    network: FrozenNetworkConfig
+    logging: FrozenLoggingConfig
+    email: FrozenEmailConfig
+    tracking: FrozenTrackingConfig
+    base_url: str
+    summary_url: str
+    download_url_template: str
+
+
 class BOPMalagaConfig:
     """Main configuration class for BOP Málaga PDF Downloader."""
     
     def __init__(self, config_file: Optional[str] = None):
         """Initialize configuration with defaults and optional file override."""
+        # Derived views, memoized until invalidate() is called
+        self._dict_cache: Optional[Dict[str, Any]] = None
+        self._str_cache: Optional[str] = None
+        
+        # Set once a file or environment override changes a default
+        self._dirty = False
+        
         # Initialize with default configurations
         self.download = DownloadConfig()
         self.network = NetworkConfig()
@@ -134,6 +336,7 @@ class BOPMalagaConfig:
         self.base_url = "https://www.bopmalaga.es"
         self.summary_url = f"{self.base_url}/sumario.php"
         self.download_url_template = f"{self.base_url}/descarga.php?archivo={{filename}}"
+        self._download_url_prefix = f"{self.base_url}/descarga.php?archivo="
         
         # Load custom configuration if provided
         if config_file:
@@ -142,120 +345,111 @@ class BOPMalagaConfig:
         # Load environment variables
         self.load_from_environment()
         
-        # Validate final configuration
-        self.validate()
+        # Defaults are valid by construction; only overrides need checking
+        if self._dirty:
+            self.validate()
     
     def load_from_file(self, config_file: str) -> None:
         """Load configuration from JSON file."""
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
+            # Work on a copy so list values are never shared with the cache
+            mtime_ns = os.stat(config_file).st_mtime_ns
+            config_data = copy.deepcopy(dict(_parse_config_file(config_file, mtime_ns)))
             
             # Update configurations from file
-            if 'download' in config_data:
-                self._update_config(self.download, config_data['download'])
+            for section in _SECTIONS:
+                updates = config_data.get(section)
+                if updates:
+                    self._update_config(getattr(self, section), updates)
             
-            if 'network' in config_data:
-                self._update_config(self.network, config_data['network'])
-            
-            if 'logging' in config_data:
-                self._update_config(self.logging, config_data['logging'])
-            
-            if 'email' in config_data:
-                self._update_config(self.email, config_data['email'])
-            
-            if 'tracking' in config_data:
-                self._update_config(self.tracking, config_data['tracking'])
-            
-            logging.info(f"Configuration loaded from {config_file}")
+            _LOG.info("Configuration loaded from %s", config_file)
             
         except FileNotFoundError:
-            logging.warning(f"Configuration file not found: {config_file}")
+            _LOG.warning("Configuration file not found: %s", config_file)
         except json.JSONDecodeError as e:
-            logging.error(f"Invalid JSON in configuration file {config_file}: {e}")
+            _LOG.error("Invalid JSON in configuration file %s: %s", config_file, e)
             raise
         except Exception as e:
-            logging.error(f"Error loading configuration from {config_file}: {e}")
+            _LOG.error("Error loading configuration from %s: %s", config_file, e)
             raise
     
     def load_from_environment(self) -> None:
         """Load configuration from environment variables."""
-        env_mappings = {
-            # Download settings
-            'BOP_DOWNLOAD_DIR': ('download', 'download_dir'),
-            'BOP_MAX_STORAGE_MB': ('download', 'max_storage_mb', int),
-            'BOP_CLEANUP_DAYS': ('download', 'cleanup_days', int),
-            'BOP_COMPRESS_OLD_FILES': ('download', 'compress_old_files', bool),
-            
-            # Network settings
-            'BOP_CRAWL_DELAY': ('network', 'crawl_delay', float),
-            'BOP_MAX_RETRIES': ('network', 'max_retries', int),
-            'BOP_TIMEOUT': ('network', 'timeout', int),
-            'BOP_USER_AGENT': ('network', 'user_agent'),
-            
-            # Logging settings
-            'BOP_LOGS_DIR': ('logging', 'logs_dir'),
-            'BOP_LOG_LEVEL': ('logging', 'log_level'),
-            'BOP_LOG_FILE': ('logging', 'log_file'),
-            'BOP_MAX_LOG_SIZE_MB': ('logging', 'max_log_size_mb', int),
-            
-            # Email settings
-            'BOP_EMAIL_ENABLED': ('email', 'enabled', bool),
-            'BOP_SMTP_SERVER': ('email', 'smtp_server'),
-            'BOP_SMTP_PORT': ('email', 'smtp_port', int),
-            'BOP_EMAIL_USERNAME': ('email', 'username'),
-            'BOP_EMAIL_PASSWORD': ('email', 'password'),
-            'BOP_FROM_EMAIL': ('email', 'from_email'),
-            'BOP_TO_EMAILS': ('email', 'to_emails', 'list'),
-            
-            # Tracking settings
-            'BOP_TRACKING_FILE': ('tracking', 'tracking_file'),
-            'BOP_BACKUP_TRACKING': ('tracking', 'backup_tracking', bool),
+        # Snapshot the BOP_* variables in one pass over the environment; the
+        # length and first-character checks reject most names cheaply
+        bop_env = {
+            name: value for name, value in os.environ.items()
+            if len(name) > 4 and name[0] == 'B' and name.startswith('BOP_')
         }
         
-        for env_var, config_path in env_mappings.items():
-            value = os.getenv(env_var)
-            if value is not None:
-                try:
-                    section = config_path[0]
-                    attr = config_path[1]
-                    converter = config_path[2] if len(config_path) > 2 else str
-                    
-                    # Convert value based on type
-                    if converter == bool:
-                        converted_value = value.lower() in ('true', '1', 'yes', 'on')
-                    elif converter == 'list':
-                        converted_value = [email.strip() for email in value.split(',')]
-                    else:
-                        converted_value = converter(value)
-                    
-                    # Set the value
-                    config_obj = getattr(self, section)
-                    setattr(config_obj, attr, converted_value)
-                    
-                except (ValueError, AttributeError) as e:
-                    logging.warning(f"Invalid environment variable {env_var}={value}: {e}")
+        # Resolve section names to their config objects once
+        targets = {section: getattr(self, section) for section in _SECTIONS}
+        
+        for env_var, value in bop_env.items():
+            config_path = _ENV_MAPPINGS.get(env_var)
+            if config_path is None:
+                continue
+            
+            try:
+                section, attr, converter = config_path
+                
+                # Convert value based on type
+                converted_value = converter(value)
+                
+                # Set the value
+                if getattr(targets[section], attr) != converted_value:
+                    setattr(targets[section], attr, converted_value)
+                    self._dirty = True
+                
+            except (ValueError, AttributeError) as e:
+                _LOG.warning("Invalid environment variable %s=%s: %s", env_var, value, e)
+        
+        self.invalidate()
     
     def _update_config(self, config_obj: Any, updates: Dict[str, Any]) -> None:
         """Update configuration object with new values."""
+        allowed = _FIELDS[type(config_obj)]
         for key, value in updates.items():
-            if hasattr(config_obj, key):
-                setattr(config_obj, key, value)
+            if key in allowed:
+                if getattr(config_obj, key) != value:
+                    setattr(config_obj, key, value)
+                    self._dirty = True
             else:
-                logging.warning(f"Unknown configuration key: {key}")
+                _LOG.warning("Unknown configuration key: %s", key)
+        
+        self.invalidate()
     
     def validate(self) -> None:
         """Validate all configuration sections."""
+        # Validate the current values, not a memoized snapshot
+        self.invalidate()
+        
+        # File and environment overrides bypass __post_init__, so store their
+        # log level upper-case here like the dataclass does
+        if isinstance(self.logging.log_level, str):
+            self.logging.log_level = sys.intern(self.logging.log_level.upper())
+        
         try:
-            # Re-run post_init validation for all configs
-            self.download.__post_init__()
-            self.network.__post_init__()
-            self.logging.__post_init__()
-            self.email.__post_init__()
-            self.tracking.__post_init__()
+            # Only configs with overrides pay for importing jsonschema
+            validator = _get_validator()
+            if validator is not None:
+                from jsonschema.exceptions import best_match
+                
+                # Check every section against the compiled schema at once
+                error = best_match(validator.iter_errors(self._cached_dict()))
+                if error is not None:
+                    path = '.'.join(str(part) for part in error.absolute_path)
+                    raise ValueError(f"{path}: {error.message}")
+            else:
+                # Re-run post_init validation for all configs
+                self.download.__post_init__()
+                self.network.__post_init__()
+                self.logging.__post_init__()
+                self.email.__post_init__()
+                self.tracking.__post_init__()
             
         except ValueError as e:
-            logging.error(f"Configuration validation failed: {e}")
+            _LOG.error("Configuration validation failed: %s", e)
             raise
     
     def create_directories(self) -> None:
@@ -267,36 +461,78 @@ class BOPMalagaConfig:
         
         for directory in directories:
             try:
-                Path(directory).mkdir(parents=True, exist_ok=True)
-                logging.debug(f"Created directory: {directory}")
+                os.makedirs(directory, exist_ok=True)
+                _LOG.debug("Created directory: %s", directory)
             except Exception as e:
-                logging.error(f"Failed to create directory {directory}: {e}")
+                _LOG.error("Failed to create directory %s: %s", directory, e)
                 raise
     
+    def invalidate(self) -> None:
+        """Drop memoized to_dict/__str__ results after changing settings."""
+        self._dict_cache = None
+        self._str_cache = None
+    
+    def _cached_dict(self) -> Dict[str, Any]:
+        """Return the memoized dictionary form; callers must not modify it."""
+        if self._dict_cache is None:
+            # Sections are flat, so shallow copies replace asdict's deep copy
+            self._dict_cache = {
+                'download': _shallow_dict(self.download),
+                'network': _shallow_dict(self.network),
+                'logging': _shallow_dict(self.logging),
+                'email': _shallow_dict(self.email),
+                'tracking': _shallow_dict(self.tracking),
+                'base_url': self.base_url,
+                'summary_url': self.summary_url,
+                'download_url_template': self.download_url_template,
+            }
+        return self._dict_cache
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert configuration to dictionary."""
-        return {
-            'download': asdict(self.download),
-            'network': asdict(self.network),
-            'logging': asdict(self.logging),
-            'email': asdict(self.email),
-            'tracking': asdict(self.tracking),
-            'base_url': self.base_url,
-            'summary_url': self.summary_url,
-            'download_url_template': self.download_url_template,
+        # Copy the cached sections so edits by the caller never reach it; only
+        # the to_emails list needs copying inside them
+        config_dict = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in self._cached_dict().items()
         }
+        config_dict['email']['to_emails'] = list(config_dict['email']['to_emails'])
+        return config_dict
     
     def save_to_file(self, config_file: str) -> None:
         """Save current configuration to JSON file."""
         try:
-            config_dict = self.to_dict()
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, indent=2, ensure_ascii=False)
-            logging.info(f"Configuration saved to {config_file}")
+            config_dict = self._cached_dict()
+            if orjson is not None:
+                # orjson writes UTF-8 directly, non-ASCII text included
+                with open(config_file, 'wb') as f:
+                    f.write(orjson.dumps(config_dict, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with open(config_file, 'w', encoding='utf-8') as f:
+                    json.dump(config_dict, f, indent=2, ensure_ascii=False)
+            _LOG.info("Configuration saved to %s", config_file)
         except Exception as e:
-            logging.error(f"Failed to save configuration to {config_file}: {e}")
+            _LOG.error("Failed to save configuration to %s: %s", config_file, e)
             raise
     
+    def freeze(self) -> FrozenBOPMalagaConfig:
+        """Return a hashable snapshot of the current configuration."""
+        return FrozenBOPMalagaConfig(
+            download=FrozenDownloadConfig(**_shallow_dict(self.download)),
+            network=FrozenNetworkConfig(**_shallow_dict(self.network)),
+            logging=FrozenLoggingConfig(**_shallow_dict(self.logging)),
+            email=FrozenEmailConfig(**{**_shallow_dict(self.email),
+                                       'to_emails': tuple(self.email.to_emails)}),
+            tracking=FrozenTrackingConfig(**_shallow_dict(self.tracking)),
+            base_url=self.base_url,
+            summary_url=self.summary_url,
+            download_url_template=self.download_url_template,
+        )
+    
+    def download_url(self, filename: str) -> str:
+        """Build the download URL for a PDF filename."""
+        return self._download_url_prefix + filename
+    
     def get_log_file_path(self) -> str:
         """Get full path to log file."""
         return os.path.join(self.logging.logs_dir, self.logging.log_file)
@@ -307,10 +543,12 @@ class BOPMalagaConfig:
     
     def __str__(self) -> str:
         """String representation of configuration."""
-        return f"BOPMalagaConfig(download_dir={self.download.download_dir}, " \
-               f"max_storage={self.download.max_storage_mb}MB, " \
-               f"crawl_delay={self.network.crawl_delay}s, " \
-               f"log_level={self.logging.log_level})"
+        if self._str_cache is None:
+            self._str_cache = f"BOPMalagaConfig(download_dir={self.download.download_dir}, " \
+                              f"max_storage={self.download.max_storage_mb}MB, " \
+                              f"crawl_delay={self.network.crawl_delay}s, " \
+                              f"log_level={self.logging.log_level})"
+        return self._str_cache
 
 
 def load_config(config_file: Optional[str] = None) -> BOPMalagaConfig:
@@ -328,6 +566,7 @@ def create_sample_config(output_file: str = 'config.json') -> None:
     config.network.crawl_delay = 5.0
     config.logging.log_level = 'INFO'
     config.email.enabled = False  # Disabled by default
+    config.invalidate()
     
     config.save_to_file(output_file)
     print(f"Sample configuration created: {output_file}")
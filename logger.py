@@ -23,24 +23,79 @@ Author: Automated Deployment System
 Date: 2025
 """
 
+import io
 import os
 import sys
+import gzip
 import json
-import smtplib
+import shutil
+import queue
+import sched
 import logging
 import logging.handlers
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
-from dataclasses import dataclass, asdict
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Union
+from dataclasses import dataclass, asdict, fields, replace
 import threading
 import time
-from collections import defaultdict, deque
-import traceback
+from collections import deque
+
+# SMTP, MIME and traceback modules are imported on first use, so processes
+# that never send a notification do not pay for loading them
+if TYPE_CHECKING:
+    import smtplib
+    from email.mime.multipart import MIMEMultipart
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# (second, ISO string) of the most recently formatted wall-clock second
+_ts_cache = (0, '')
+
+
+def _now_iso() -> str:
+    """Return the current time as ISO text, formatted at most once per second."""
+    global _ts_cache
+    now = int(time.time())
+    cached = _ts_cache
+    if cached[0] != now:
+        cached = _ts_cache = (now, datetime.fromtimestamp(now).isoformat())
+    return cached[1]
+
+
+def _dumps_line(entry: Dict[str, Any]) -> bytes:
+    """Serialize an error history entry as one JSON Lines record."""
+    if orjson is not None:
+        return orjson.dumps(entry) + b'\n'
+    return json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes with orjson when available."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _gzip_namer(name: str) -> str:
+    """Name rotated log backups with a .gz suffix."""
+    return name + '.gz'
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    """Compress a rotated log file into dest and remove the original."""
+    try:
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+    except OSError:
+        # Leave the uncompressed log in place rather than a partial backup
+        if os.path.exists(dest):
+            os.remove(dest)
+        raise
+    
+    os.remove(source)
 
 
 @dataclass
@@ -78,6 +133,50 @@ class DownloadMetrics:
         return asdict(self)
 
 
+# Log level -> LogMetrics counter, and the timestamp field it updates
+_LEVEL_COUNTERS = {
+    logging.DEBUG: 'debug_count',
+    logging.INFO: 'info_count',
+    logging.WARNING: 'warning_count',
+    logging.ERROR: 'error_count',
+    logging.CRITICAL: 'critical_count',
+}
+_LEVEL_TIMESTAMPS = {
+    logging.ERROR: 'last_error_time',
+    logging.CRITICAL: 'last_critical_time',
+}
+_LEVEL_NUMBERS = {logging.getLevelName(levelno): levelno for levelno in _LEVEL_COUNTERS}
+
+
+class _MetricsShard:
+    """Counters owned by a single thread, merged only when a snapshot is taken."""
+    
+    __slots__ = ('log', 'download', 'download_time_total')
+    
+    def __init__(self):
+        """Initialize empty per-thread counters."""
+        self.log = LogMetrics()
+        self.download = DownloadMetrics()
+        self.download_time_total = 0.0  # Summed so shards merge into one average
+
+
+def _merge_metrics(base: Any, parts: List[Any]) -> Any:
+    """Add shard counters onto a copy of base, keeping the latest timestamps."""
+    merged = replace(base)
+    for f in fields(merged):
+        values = [getattr(part, f.name) for part in parts]
+        current = getattr(merged, f.name)
+        
+        if f.type in (int, float):
+            setattr(merged, f.name, current + sum(values))
+        else:
+            # ISO timestamps order lexicographically
+            stamps = [value for value in values + [current] if value is not None]
+            setattr(merged, f.name, max(stamps) if stamps else None)
+    
+    return merged
+
+
 class EmailNotifier:
     """Email notification system for critical alerts."""
     
@@ -93,9 +192,13 @@ class EmailNotifier:
         self.use_tls = smtp_config.get('use_tls', True)
         
         # Rate limiting for email notifications
-        self.last_notification_times = defaultdict(float)
+        self.last_notification_times: Dict[str, float] = {}  # time.monotonic() of last send
         self.min_notification_interval = 300  # 5 minutes between same type of notifications
         
+        # Authenticated SMTP connection reused across notifications
+        self._smtp: Optional['smtplib.SMTP'] = None
+        self._smtp_lock = threading.Lock()
+        
         # Initialize logger for email system
         self.logger = logging.getLogger('EmailNotifier')
     
@@ -104,10 +207,11 @@ class EmailNotifier:
         if not self.enabled:
             return False
         
-        current_time = time.time()
-        last_time = self.last_notification_times.get(notification_type, 0)
+        # Monotonic time cannot jump backwards and reopen the window early
+        current_time = time.monotonic()
+        last_time = self.last_notification_times.get(notification_type)
         
-        if current_time - last_time >= self.min_notification_interval:
+        if last_time is None or current_time - last_time >= self.min_notification_interval:
             self.last_notification_times[notification_type] = current_time
             return True
         
@@ -126,6 +230,11 @@ class EmailNotifier:
             return False
         
         try:
+            from email import encoders
+            from email.mime.base import MIMEBase
+            from email.mime.multipart import MIMEMultipart
+            from email.mime.text import MIMEText
+            
             # Create message
             msg = MIMEMultipart()
             msg['From'] = self.from_email
@@ -133,7 +242,7 @@ class EmailNotifier:
             msg['Subject'] = f"[BOP Málaga Downloader] {subject}"
             
             # Add timestamp to message
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = _now_iso()
             full_message = f"Timestamp: {timestamp}\n\n{message}"
             
             msg.attach(MIMEText(full_message, 'plain'))
@@ -141,26 +250,24 @@ class EmailNotifier:
             # Add attachments if provided
             if attachments:
                 for file_path in attachments:
-                    if os.path.exists(file_path):
+                    try:
                         with open(file_path, 'rb') as attachment:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(attachment.read())
-                            encoders.encode_base64(part)
-                            part.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename= {os.path.basename(file_path)}'
-                            )
-                            msg.attach(part)
+                            payload = attachment.read()
+                    except FileNotFoundError:
+                        self.logger.warning(f"Attachment not found, skipping: {file_path}")
+                        continue
+                    
+                    part = MIMEBase('application', 'octet-stream')
+                    part.set_payload(payload)
+                    encoders.encode_base64(part)
+                    part.add_header(
+                        'Content-Disposition',
+                        f'attachment; filename= {os.path.basename(file_path)}'
+                    )
+                    msg.attach(part)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                if self.use_tls:
-                    server.starttls()
-                
-                if self.username and self.password:
-                    server.login(self.username, self.password)
-                
-                server.send_message(msg)
+            self._send_message(msg)
             
             self.logger.info(f"Email notification sent: {subject}")
             return True
@@ -169,40 +276,95 @@ class EmailNotifier:
             self.logger.error(f"Failed to send email notification: {e}")
             return False
     
-    def send_critical_alert(self, error_message: str, exception: Optional[Exception] = None) -> bool:
-        """Send critical error alert."""
+    def _connect(self) -> 'smtplib.SMTP':
+        """Open and authenticate a new SMTP connection."""
+        import smtplib
+        
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+        try:
+            if self.use_tls:
+                server.starttls()
+            
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        
+        return server
+    
+    def _send_message(self, msg: 'MIMEMultipart') -> None:
+        """Send a message over the cached connection, reconnecting once if dropped."""
+        import smtplib
+        
+        with self._smtp_lock:
+            for attempt in range(2):
+                if self._smtp is None:
+                    self._smtp = self._connect()
+                
+                try:
+                    self._smtp.send_message(msg)
+                    return
+                except smtplib.SMTPServerDisconnected:
+                    # Server closed the idle connection; retry on a fresh one
+                    self._smtp = None
+                    if attempt:
+                        raise
+    
+    def close(self) -> None:
+        """Close the cached SMTP connection."""
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except Exception:
+                    self._smtp.close()
+                self._smtp = None
+    
+    def send_critical_alert(self, error_message: str, exception: Optional[Exception] = None,
+                            exc_text: Optional[str] = None) -> bool:
+        """Send critical error alert, with an already formatted traceback if given."""
         subject = "CRITICAL: BOP Málaga Downloader Failure"
         
-        message = f"A critical error has occurred in the BOP Málaga PDF Downloader:\n\n"
-        message += f"Error: {error_message}\n\n"
+        buf = io.StringIO()
+        buf.write("A critical error has occurred in the BOP Málaga PDF Downloader:\n\n")
+        buf.write(f"Error: {error_message}\n\n")
         
         if exception:
-            message += f"Exception Details:\n{str(exception)}\n\n"
-            message += f"Traceback:\n{traceback.format_exc()}\n\n"
+            # Format the exception's own traceback, not whatever is being handled now
+            if exc_text is None:
+                import traceback
+                
+                exc_text = ''.join(traceback.format_exception(
+                    type(exception), exception, exception.__traceback__
+                ))
+            buf.write(f"Exception Details:\n{str(exception)}\n\n")
+            buf.write(f"Traceback:\n{exc_text}\n\n")
         
-        message += "Please check the system logs for more details and take appropriate action."
+        buf.write("Please check the system logs for more details and take appropriate action.")
         
-        return self.send_notification(subject, message, 'critical_error')
+        return self.send_notification(subject, buf.getvalue(), 'critical_error')
     
     def send_success_summary(self, metrics: Dict[str, Any]) -> bool:
         """Send daily success summary."""
         subject = "Daily Summary: BOP Málaga Downloader"
         
-        message = "Daily summary of BOP Málaga PDF Downloader activity:\n\n"
-        message += f"Downloads attempted: {metrics.get('total_attempts', 0)}\n"
-        message += f"Successful downloads: {metrics.get('successful_downloads', 0)}\n"
-        message += f"Failed downloads: {metrics.get('failed_downloads', 0)}\n"
-        message += f"Skipped downloads: {metrics.get('skipped_downloads', 0)}\n"
-        message += f"Total size downloaded: {metrics.get('total_size_mb', 0):.2f} MB\n"
-        message += f"Average download time: {metrics.get('average_download_time', 0):.2f} seconds\n\n"
+        buf = io.StringIO()
+        buf.write("Daily summary of BOP Málaga PDF Downloader activity:\n\n")
+        buf.write(f"Downloads attempted: {metrics.get('total_attempts', 0)}\n")
+        buf.write(f"Successful downloads: {metrics.get('successful_downloads', 0)}\n")
+        buf.write(f"Failed downloads: {metrics.get('failed_downloads', 0)}\n")
+        buf.write(f"Skipped downloads: {metrics.get('skipped_downloads', 0)}\n")
+        buf.write(f"Total size downloaded: {metrics.get('total_size_mb', 0):.2f} MB\n")
+        buf.write(f"Average download time: {metrics.get('average_download_time', 0):.2f} seconds\n\n")
         
         if metrics.get('errors'):
-            message += f"Errors encountered: {len(metrics['errors'])}\n"
-            message += "Recent errors:\n"
+            buf.write(f"Errors encountered: {len(metrics['errors'])}\n")
+            buf.write("Recent errors:\n")
             for error in metrics['errors'][-5:]:  # Last 5 errors
-                message += f"  - {error}\n"
+                buf.write(f"  - {error}\n")
         
-        return self.send_notification(subject, message, 'daily_summary')
+        return self.send_notification(subject, buf.getvalue(), 'daily_summary')
 
 
 class MetricsCollector:
@@ -211,124 +373,272 @@ class MetricsCollector:
     def __init__(self, metrics_file: str = './logs/metrics.json'):
         """Initialize metrics collector."""
         self.metrics_file = metrics_file
-        self.log_metrics = LogMetrics()
-        self.download_metrics = DownloadMetrics()
+        self.errors_file = os.path.join(os.path.dirname(metrics_file), 'errors.jsonl')
+        self._base_log_metrics = LogMetrics()
+        self._base_download_metrics = DownloadMetrics()
         self.error_history = deque(maxlen=100)  # Keep last 100 errors
         self.session_start = datetime.now()
         
+        # Per-thread counter shards, so recording never contends on shared fields
+        self._local = threading.local()
+        self._shards: List[_MetricsShard] = []
+        self._shards_lock = threading.Lock()
+        
+        # Set whenever something is recorded, so unchanged metrics are not rewritten
+        self._metrics_dirty = True
+        self._metrics_unsynced = False  # Last save has not been fsynced yet
+        
+        # Lines in the error log, compacted once it outgrows the history
+        self._error_lines = 0
+        self._errors_lock = threading.Lock()
+        
         # Initialize session start time
-        self.log_metrics.session_start_time = self.session_start.isoformat()
+        self._base_log_metrics.session_start_time = self.session_start.isoformat()
+        
+        # Created before loading, which may need to report a bad file
+        self.logger = logging.getLogger('MetricsCollector')
         
         # Load existing metrics if available
         self.load_metrics()
-        
-        self.logger = logging.getLogger('MetricsCollector')
     
     def load_metrics(self) -> None:
         """Load metrics from file."""
-        if os.path.exists(self.metrics_file):
-            try:
-                with open(self.metrics_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                if 'log_metrics' in data:
-                    self.log_metrics = LogMetrics(**data['log_metrics'])
-                
-                if 'download_metrics' in data:
-                    self.download_metrics = DownloadMetrics(**data['download_metrics'])
-                
-                if 'error_history' in data:
-                    self.error_history = deque(data['error_history'], maxlen=100)
-                
-                self.logger.debug("Metrics loaded from file")
-                
-            except Exception as e:
-                self.logger.warning(f"Could not load metrics: {e}")
+        # Open directly; a missing file just means there is nothing to load
+        try:
+            with open(self.metrics_file, 'rb') as f:
+                data = _loads(f.read())
+            
+            if 'log_metrics' in data:
+                self._base_log_metrics = LogMetrics(**data['log_metrics'])
+            
+            if 'download_metrics' in data:
+                self._base_download_metrics = DownloadMetrics(**data['download_metrics'])
+            
+            if 'error_history' in data:
+                self.error_history = deque(data['error_history'], maxlen=100)
+            
+            self.logger.debug("Metrics loaded from file")
+            
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Could not load metrics: {e}")
+        
+        # Error history lives in an append-only log; keep its last entries
+        try:
+            # Keep the last entries for the history, but count every line so
+            # compaction still sees a log that grew over many short runs
+            lines = deque(maxlen=self.error_history.maxlen)
+            line_count = 0
+            with open(self.errors_file, 'rb') as f:
+                for line in f:
+                    lines.append(line)
+                    line_count += 1
+            self._error_lines = line_count
+            
+            self.error_history = deque(
+                (_loads(line) for line in lines if line.strip()),
+                maxlen=self.error_history.maxlen
+            )
+            
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning(f"Could not load error history: {e}")
+    
+    def _shard(self) -> _MetricsShard:
+        """Return the calling thread's counter shard, creating it on first use."""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _MetricsShard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+    
+    @property
+    def log_metrics(self) -> LogMetrics:
+        """Log metrics summed over the loaded totals and all thread shards."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        return _merge_metrics(self._base_log_metrics, [shard.log for shard in shards])
+    
+    @property
+    def download_metrics(self) -> DownloadMetrics:
+        """Download metrics summed over the loaded totals and all thread shards."""
+        with self._shards_lock:
+            shards = list(self._shards)
+        
+        base = self._base_download_metrics
+        merged = _merge_metrics(base, [shard.download for shard in shards])
+        
+        # Recombine the average from the loaded average and the shard time sums
+        if merged.successful_downloads:
+            total_time = (base.average_download_time * base.successful_downloads +
+                          sum(shard.download_time_total for shard in shards))
+            merged.average_download_time = total_time / merged.successful_downloads
+        else:
+            merged.average_download_time = base.average_download_time
+        
+        return merged
     
-    def save_metrics(self) -> None:
-        """Save metrics to file."""
+    def save_metrics(self, durable: bool = False) -> None:
+        """Save metrics to file if anything was recorded since the last save.
+        
+        Regular saves leave flushing to the OS; durable saves also fsync the
+        file and its directory, and are needed only once in a while.
+        """
+        if not self._metrics_dirty and not (durable and self._metrics_unsynced):
+            return
+        
+        # Clear first so events recorded during the save mark it dirty again
+        self._metrics_dirty = False
+        
         try:
             # Ensure directory exists
             os.makedirs(os.path.dirname(self.metrics_file), exist_ok=True)
             
-            data = {
-                'log_metrics': self.log_metrics.to_dict(),
-                'download_metrics': self.download_metrics.to_dict(),
-                'error_history': list(self.error_history),
-                'last_updated': datetime.now().isoformat()
-            }
+            if orjson is not None:
+                # orjson serializes the metrics dataclasses natively
+                buf = orjson.dumps({
+                    'log_metrics': self.log_metrics,
+                    'download_metrics': self.download_metrics,
+                    'last_updated': datetime.now().isoformat()
+                }, option=orjson.OPT_NON_STR_KEYS)
+            else:
+                buf = json.dumps({
+                    'log_metrics': self.log_metrics.to_dict(),
+                    'download_metrics': self.download_metrics.to_dict(),
+                    'last_updated': datetime.now().isoformat()
+                }, ensure_ascii=False).encode('utf-8')
+            
+            # Write a temporary file and rename it over the old one, so a crash
+            # mid-write never leaves a truncated metrics file behind
+            tmp_file = self.metrics_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(buf)
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_file, self.metrics_file)
+            
+            if durable:
+                # Persist the rename itself
+                dir_fd = os.open(os.path.dirname(self.metrics_file) or '.', os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            self._metrics_unsynced = not durable
             
-            with open(self.metrics_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Rewrite the error log down to the kept history once it grows large
+            self._compact_errors()
             
             self.logger.debug("Metrics saved to file")
             
         except Exception as e:
+            self._metrics_dirty = True
             self.logger.error(f"Could not save metrics: {e}")
     
+    def _compact_errors(self) -> None:
+        """Replace an oversized error log with just the entries still in the history."""
+        # Hold the append lock throughout so no entry is written twice or lost
+        with self._errors_lock:
+            if self._error_lines <= 10 * self.error_history.maxlen:
+                return
+            
+            tmp_file = self.errors_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.writelines(_dumps_line(entry) for entry in list(self.error_history))
+            os.replace(tmp_file, self.errors_file)
+            self._error_lines = len(self.error_history)
+    
+    def _count_log_level(self, levelno: int, mark_dirty: bool = True) -> None:
+        """Count a log event in the calling thread's shard."""
+        metrics = self._shard().log
+        metrics.total_logs += 1
+        if mark_dirty:
+            self._metrics_dirty = True
+        
+        counter = _LEVEL_COUNTERS.get(levelno)
+        if counter:
+            setattr(metrics, counter, getattr(metrics, counter) + 1)
+        
+        stamp = _LEVEL_TIMESTAMPS.get(levelno)
+        if stamp:
+            setattr(metrics, stamp, _now_iso())
+    
+    def _record_error(self, level: str, message: str) -> None:
+        """Append an entry to the error history and to the error log."""
+        entry = {
+            'timestamp': datetime.now().isoformat(),
+            'level': level,
+            'message': message
+        }
+        
+        # One appended line per error instead of rewriting the whole history;
+        # the history and the log change together so compaction sees both
+        with self._errors_lock:
+            self.error_history.append(entry)
+            try:
+                with open(self.errors_file, 'ab') as f:
+                    f.write(_dumps_line(entry))
+                self._error_lines += 1
+            except OSError:
+                pass  # History is still kept in memory; never log from here
+    
     def record_log_event(self, level: str, message: str) -> None:
         """Record a log event."""
-        self.log_metrics.total_logs += 1
-        
-        level_lower = level.lower()
-        if level_lower == 'error':
-            self.log_metrics.error_count += 1
-            self.log_metrics.last_error_time = datetime.now().isoformat()
-            self.error_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'level': level,
-                'message': message
-            })
-        elif level_lower == 'warning':
-            self.log_metrics.warning_count += 1
-        elif level_lower == 'info':
-            self.log_metrics.info_count += 1
-        elif level_lower == 'debug':
-            self.log_metrics.debug_count += 1
-        elif level_lower == 'critical':
-            self.log_metrics.critical_count += 1
-            self.log_metrics.last_critical_time = datetime.now().isoformat()
-            self.error_history.append({
-                'timestamp': datetime.now().isoformat(),
-                'level': level,
-                'message': message
-            })
+        levelno = _LEVEL_NUMBERS.get(level.upper(), logging.NOTSET)
+        self._count_log_level(levelno)
+        if levelno >= logging.ERROR:
+            self._record_error(level, message)
+    
+    def record_log_record(self, record: logging.LogRecord) -> None:
+        """Record a log event straight from a LogRecord."""
+        # The collector's own records, like "Metrics saved", are counted but
+        # must not make the next save rewrite otherwise unchanged metrics
+        self._count_log_level(record.levelno, mark_dirty=record.name != self.logger.name)
+        
+        # Only errors keep their message, so only they pay for formatting it
+        if record.levelno >= logging.ERROR:
+            self._record_error(record.levelname, record.getMessage())
     
     def record_download_attempt(self) -> None:
         """Record a download attempt."""
-        self.download_metrics.total_attempts += 1
+        self._shard().download.total_attempts += 1
+        self._metrics_dirty = True
     
     def record_download_success(self, file_size_mb: float, download_time: float) -> None:
         """Record a successful download."""
-        self.download_metrics.successful_downloads += 1
-        self.download_metrics.total_size_mb += file_size_mb
-        self.download_metrics.last_successful_download = datetime.now().isoformat()
-        
-        # Update average download time
-        total_successful = self.download_metrics.successful_downloads
-        current_avg = self.download_metrics.average_download_time
-        self.download_metrics.average_download_time = (
-            (current_avg * (total_successful - 1) + download_time) / total_successful
-        )
+        shard = self._shard()
+        shard.download.successful_downloads += 1
+        shard.download.total_size_mb += file_size_mb
+        shard.download.last_successful_download = _now_iso()
+        
+        # Accumulate time; the average is derived when metrics are read
+        shard.download_time_total += download_time
+        self._metrics_dirty = True
     
     def record_download_failure(self, error_message: str) -> None:
         """Record a failed download."""
-        self.download_metrics.failed_downloads += 1
-        self.download_metrics.last_failed_download = datetime.now().isoformat()
+        shard = self._shard()
+        shard.download.failed_downloads += 1
+        shard.download.last_failed_download = _now_iso()
+        self._metrics_dirty = True
         
-        self.error_history.append({
-            'timestamp': datetime.now().isoformat(),
-            'level': 'ERROR',
-            'message': f"Download failed: {error_message}"
-        })
+        self._record_error('ERROR', f"Download failed: {error_message}")
     
     def record_download_skipped(self) -> None:
         """Record a skipped download."""
-        self.download_metrics.skipped_downloads += 1
+        self._shard().download.skipped_downloads += 1
+        self._metrics_dirty = True
     
     def get_summary_report(self) -> Dict[str, Any]:
         """Get comprehensive metrics summary."""
         session_duration = datetime.now() - self.session_start
+        log_metrics = self.log_metrics
+        download_metrics = self.download_metrics
         
         return {
             'session_info': {
@@ -336,20 +646,20 @@ class MetricsCollector:
                 'duration_minutes': session_duration.total_seconds() / 60,
                 'current_time': datetime.now().isoformat()
             },
-            'log_metrics': self.log_metrics.to_dict(),
-            'download_metrics': self.download_metrics.to_dict(),
+            'log_metrics': log_metrics.to_dict(),
+            'download_metrics': download_metrics.to_dict(),
             'error_summary': {
                 'total_errors': len(self.error_history),
                 'recent_errors': list(self.error_history)[-10:] if self.error_history else []
             },
             'performance': {
                 'success_rate': (
-                    self.download_metrics.successful_downloads / 
-                    max(self.download_metrics.total_attempts, 1) * 100
+                    download_metrics.successful_downloads / 
+                    max(download_metrics.total_attempts, 1) * 100
                 ),
                 'error_rate': (
-                    self.log_metrics.error_count / 
-                    max(self.log_metrics.total_logs, 1) * 100
+                    log_metrics.error_count / 
+                    max(log_metrics.total_logs, 1) * 100
                 )
             }
         }
@@ -370,8 +680,11 @@ class BOPMalagaLogger:
             'backup_count': 5,
             'console_logging': True,
             'structured_format': True,
+            'json_file_log': False,  # Write the log file as JSON lines instead of text
             'metrics_enabled': True,
-            'email_notifications': True
+            'email_notifications': True,
+            'buffer_capacity': 512,  # Log records held in memory between file writes
+            'flush_interval': 30  # Seconds between forced flushes of buffered records
         }
         
         # Update with provided configuration
@@ -404,7 +717,7 @@ class BOPMalagaLogger:
         # Create log file path
         log_file_path = self.logs_dir / self.config['log_file']
         
-        # Create formatter
+        # Create formatters
         if self.config['structured_format']:
             formatter = logging.Formatter(
                 '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s',
@@ -416,6 +729,18 @@ class BOPMalagaLogger:
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
         
+        # JSON lines change the on-disk log format, so they are opt-in; the
+        # console always keeps a human-readable layout
+        file_formatter = JSONFormatter() if self.config['json_file_log'] else formatter
+        
+        # No formatter here uses thread or process details, so skip collecting
+        # them; shutdown() restores the process-wide defaults
+        self._saved_log_flags = (logging.logThreads, logging.logProcesses,
+                                 logging.logMultiprocessing)
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        
         # Setup root logger
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, self.config['log_level'].upper()))
@@ -430,8 +755,21 @@ class BOPMalagaLogger:
             backupCount=self.config['backup_count'],
             encoding='utf-8'
         )
-        file_handler.setFormatter(formatter)
-        root_logger.addHandler(file_handler)
+        file_handler.setFormatter(file_formatter)
+        
+        # Compress backups as they rotate; the active log stays plain text
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
+        
+        # Buffer file records in memory and write them in batches; errors
+        # and above flush the buffer immediately
+        self._mem_handler = logging.handlers.MemoryHandler(
+            capacity=self.config['buffer_capacity'],
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True
+        )
+        root_logger.addHandler(self._mem_handler)
         
         # Console handler
         if self.config['console_logging']:
@@ -444,58 +782,133 @@ class BOPMalagaLogger:
             metrics_handler = MetricsHandler(self.metrics_collector)
             root_logger.addHandler(metrics_handler)
         
-        # Custom handler for email notifications
+        # Custom handler for email notifications, run on a listener thread so
+        # logging an error never waits on SMTP
+        self._email_listener = None
+        self._email_queue_handler = None
         if self.email_notifier.enabled:
             email_handler = EmailHandler(self.email_notifier)
             email_handler.setLevel(logging.ERROR)  # Only send emails for errors and above
-            root_logger.addHandler(email_handler)
+            
+            email_queue = queue.Queue(maxsize=1000)
+            queue_handler = _DroppingQueueHandler(email_queue)
+            queue_handler.setLevel(logging.ERROR)
+            root_logger.addHandler(queue_handler)
+            self._email_queue_handler = queue_handler
+            
+            self._email_listener = logging.handlers.QueueListener(
+                email_queue, email_handler, respect_handler_level=True
+            )
+            self._email_listener.start()
     
     def _start_background_tasks(self) -> None:
         """Start background tasks for metrics and notifications."""
+        # A single scheduler thread runs every periodic task; waiting on the
+        # stop event instead of sleeping lets shutdown() wake it at once
+        self._stop = threading.Event()
+        self._scheduler = sched.scheduler(time.monotonic, self._stop.wait)
+        
+        # Flush buffered log records
+        self._scheduler.enter(self.config['flush_interval'], 1, self._flush_log_tick)
+        
         if self.metrics_collector:
-            # Start metrics saving thread
-            metrics_thread = threading.Thread(
-                target=self._metrics_saver_task,
-                daemon=True
-            )
-            metrics_thread.start()
+            # Save metrics every 5 minutes, syncing them to disk every hour
+            self._scheduler.enter(300, 1, self._save_metrics_tick)
+            self._scheduler.enter(3600, 1, self._sync_metrics_tick)
         
         if self.email_notifier.enabled:
-            # Start daily summary thread
-            summary_thread = threading.Thread(
-                target=self._daily_summary_task,
-                daemon=True
-            )
-            summary_thread.start()
+            # Check every hour whether a daily summary is due
+            self._last_summary_date = datetime.now().date()
+            self._scheduler.enter(3600, 1, self._daily_check_tick)
+        
+        self._scheduler_thread = threading.Thread(
+            target=self._run_scheduler,
+            daemon=True
+        )
+        self._scheduler_thread.start()
+    
+    def _run_scheduler(self) -> None:
+        """Run due tasks until shutdown, sleeping on the stop event in between."""
+        # A blocking run() would keep spinning on the already-set event if
+        # a task slipped into the queue during shutdown
+        while not self._stop.is_set():
+            delay = self._scheduler.run(blocking=False)
+            if delay is None:
+                break
+            self._stop.wait(delay)
+    
+    def _reschedule(self, delay: float, action) -> None:
+        """Queue the next run of a periodic task unless shutting down."""
+        if not self._stop.is_set():
+            self._scheduler.enter(delay, 1, action)
     
-    def _metrics_saver_task(self) -> None:
-        """Background task to periodically save metrics."""
-        while True:
+    def _stop_background_tasks(self) -> None:
+        """Cancel pending periodic tasks and wait for the scheduler thread."""
+        self._stop.set()
+        for event in self._scheduler.queue:
             try:
-                time.sleep(300)  # Save every 5 minutes
-                if self.metrics_collector:
-                    self.metrics_collector.save_metrics()
-            except Exception as e:
-                logging.getLogger('MetricsSaver').error(f"Error saving metrics: {e}")
+                self._scheduler.cancel(event)
+            except ValueError:
+                pass  # Already started running
+        self._scheduler_thread.join(timeout=5)
     
-    def _daily_summary_task(self) -> None:
-        """Background task to send daily summaries."""
-        last_summary_date = datetime.now().date()
+    def _flush_log_tick(self) -> None:
+        """Periodic task that writes out buffered log records."""
+        if self._stop.is_set():
+            return
         
-        while True:
-            try:
-                time.sleep(3600)  # Check every hour
-                current_date = datetime.now().date()
+        try:
+            self._mem_handler.flush()
+        except Exception as e:
+            logging.getLogger('LogFlusher').error(f"Error flushing log buffer: {e}")
+        
+        self._reschedule(self.config['flush_interval'], self._flush_log_tick)
+    
+    def _save_metrics_tick(self) -> None:
+        """Periodic task that saves metrics."""
+        if self._stop.is_set():
+            return
+        
+        try:
+            if self.metrics_collector:
+                self.metrics_collector.save_metrics()
+        except Exception as e:
+            logging.getLogger('MetricsSaver').error(f"Error saving metrics: {e}")
+        
+        self._reschedule(300, self._save_metrics_tick)
+    
+    def _sync_metrics_tick(self) -> None:
+        """Periodic task that saves metrics durably."""
+        if self._stop.is_set():
+            return
+        
+        try:
+            if self.metrics_collector:
+                self.metrics_collector.save_metrics(durable=True)
+        except Exception as e:
+            logging.getLogger('MetricsSaver').error(f"Error syncing metrics: {e}")
+        
+        self._reschedule(3600, self._sync_metrics_tick)
+    
+    def _daily_check_tick(self) -> None:
+        """Periodic task that sends the daily summary once a new day starts."""
+        if self._stop.is_set():
+            return
+        
+        try:
+            current_date = datetime.now().date()
+            
+            # Send summary if it's a new day
+            if current_date > self._last_summary_date:
+                if self.metrics_collector:
+                    summary = self.metrics_collector.get_summary_report()
+                    self.email_notifier.send_success_summary(summary)
+                self._last_summary_date = current_date
                 
-                # Send summary if it's a new day
-                if current_date > last_summary_date:
-                    if self.metrics_collector:
-                        summary = self.metrics_collector.get_summary_report()
-                        self.email_notifier.send_success_summary(summary)
-                    last_summary_date = current_date
-                    
-            except Exception as e:
-                logging.getLogger('DailySummary').error(f"Error sending daily summary: {e}")
+        except Exception as e:
+            logging.getLogger('DailySummary').error(f"Error sending daily summary: {e}")
+        
+        self._reschedule(3600, self._daily_check_tick)
     
     def log_download_attempt(self, edicto_id: str) -> None:
         """Log a download attempt."""
@@ -525,14 +938,25 @@ class BOPMalagaLogger:
     
     def log_critical_error(self, error_message: str, exception: Optional[Exception] = None) -> None:
         """Log a critical error and send email notification."""
-        self.logger.critical(error_message)
-        if exception:
-            self.logger.critical(f"Exception details: {str(exception)}")
-            self.logger.critical(f"Traceback: {traceback.format_exc()}")
+        exc_info = exc_text = None
+        if exception is not None:
+            import traceback
+            
+            # Format the traceback once for both the log record and the alert
+            exc_info = (type(exception), exception, exception.__traceback__)
+            exc_text = ''.join(traceback.format_exception(*exc_info)).rstrip('\n')
+        
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            # Formatters reuse a record's exc_text instead of formatting again
+            fn, lno, func, sinfo = self.logger.findCaller()
+            record = self.logger.makeRecord(self.logger.name, logging.CRITICAL, fn, lno,
+                                            error_message, (), exc_info, func, sinfo=sinfo)
+            record.exc_text = exc_text
+            self.logger.handle(record)
         
         # Send email notification
         if self.email_notifier.enabled:
-            self.email_notifier.send_critical_alert(error_message, exception)
+            self.email_notifier.send_critical_alert(error_message, exception, exc_text=exc_text)
     
     def get_metrics_summary(self) -> Optional[Dict[str, Any]]:
         """Get current metrics summary."""
@@ -544,12 +968,65 @@ class BOPMalagaLogger:
         """Shutdown logging system gracefully."""
         self.logger.info("Shutting down logging system")
         
+        # Stop periodic tasks before their resources are closed
+        self._stop_background_tasks()
+        
         # Save final metrics
         if self.metrics_collector:
-            self.metrics_collector.save_metrics()
+            self.metrics_collector.save_metrics(durable=True)
+        
+        # Report notifications lost to a full queue while the log is still open
+        if self._email_queue_handler is not None and self._email_queue_handler.dropped:
+            self.logger.warning("Dropped %d email notifications while the queue was full",
+                                self._email_queue_handler.dropped)
+        
+        # Write out buffered records before the handlers are torn down
+        self._mem_handler.flush()
+        self._mem_handler.close()
+        
+        # Deliver queued email notifications, then drop the SMTP connection
+        if self._email_listener:
+            self._email_listener.stop()
+        self.email_notifier.close()
         
         # Shutdown logging
         logging.shutdown()
+        
+        # Give other logging users back their thread and process details
+        (logging.logThreads, logging.logProcesses,
+         logging.logMultiprocessing) = self._saved_log_flags
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as compact JSON lines for the structured log file.
+    
+    The raw record.created float is written instead of a formatted asctime,
+    and the call site is included only for warnings and above.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a log record as a single JSON object."""
+        entry = {
+            't': record.created,
+            'lvl': record.levelname,
+            'n': record.name,
+            'm': record.getMessage() if record.args else str(record.msg),
+        }
+        
+        if record.levelno >= logging.WARNING:
+            entry['fn'] = record.funcName
+            entry['ln'] = record.lineno
+        
+        if record.exc_info:
+            # Cache the traceback text on the record like logging.Formatter does
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode('utf-8')
+        return json.dumps(entry, ensure_ascii=False, default=str)
 
 
 class MetricsHandler(logging.Handler):
@@ -560,18 +1037,42 @@ class MetricsHandler(logging.Handler):
         super().__init__()
         self.metrics_collector = metrics_collector
     
+    def handle(self, record: logging.LogRecord) -> bool:
+        """Count the record without taking the handler lock.
+        
+        Counters live in per-thread shards, so the lock that Handler.handle
+        takes around emit() would only serialize every logging thread.
+        """
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+    
     def emit(self, record: logging.LogRecord) -> None:
         """Handle log record for metrics."""
         try:
-            self.metrics_collector.record_log_event(
-                record.levelname,
-                record.getMessage()
-            )
+            self.metrics_collector.record_log_record(record)
         except Exception:
             # Ignore errors in metrics collection to avoid logging loops
             pass
 
 
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that counts records dropped while the queue is full."""
+    
+    def __init__(self, queue_: queue.Queue):
+        """Initialize with an empty drop count."""
+        super().__init__(queue_)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record, dropping it instead of blocking when the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
 class EmailHandler(logging.Handler):
     """Custom logging handler for email notifications."""
     
@@ -589,8 +1090,11 @@ class EmailHandler(logging.Handler):
                 message += f"Line: {record.lineno}\n"
                 message += f"Message: {record.getMessage()}\n"
                 
-                if record.exc_info:
-                    message += f"\nException: {record.exc_text or ''}"
+                # Records from QueueHandler.prepare() carry the traceback in
+                # their message with exc_info cleared; exc_text is only set
+                # when the handler is used without the queue
+                if record.exc_text:
+                    message += f"\nException: {record.exc_text}"
                 
                 notification_type = 'critical_error' if record.levelno >= logging.CRITICAL else 'error'
                 self.email_notifier.send_notification(subject, message, notification_type)
@@ -0,0 +1,214 @@
+"""Tests for the BOP Málaga downloader's rate limiting and download paths."""
+
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# A root handler keeps the downloader's basicConfig from opening log files
+# inside a temporary directory that is removed after each test
+logging.getLogger().addHandler(logging.NullHandler())
+
+from bop_malaga_downloader import BOPMalagaDownloader, RateLimiter
+
+
+PDF_URL = "https://www.bopmalaga.es/descarga.php?archivo=20250101-00001-2025-00.pdf"
+
+
+class FakeRaw(io.BytesIO):
+    """Response body that can fail after a given number of bytes."""
+
+    def __init__(self, data: bytes, fail_after: int = None):
+        super().__init__(data)
+        self.fail_after = fail_after
+        self.decode_content = False
+
+    def read(self, size=-1):
+        if self.fail_after is not None and self.tell() >= self.fail_after:
+            raise ConnectionError("connection reset mid-body")
+        if self.fail_after is not None and size is not None and size >= 0:
+            size = min(size, self.fail_after - self.tell())
+        elif self.fail_after is not None:
+            size = self.fail_after - self.tell()
+        return super().read(size)
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(self, status_code: int, headers: dict, body: bytes = b'',
+                 fail_after: int = None):
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in headers.items()}
+        self.raw = FakeRaw(body, fail_after)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    """Session that replays queued responses and records each request."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.requests.append((method, url, kwargs.get('headers') or {}))
+        return self.responses.pop(0)
+
+
+def make_downloader(root: str, **overrides) -> BOPMalagaDownloader:
+    """Build a downloader whose directories live under root."""
+    config = {
+        'download_dir': os.path.join(root, 'downloads'),
+        'logs_dir': os.path.join(root, 'logs'),
+        'cache_dir': os.path.join(root, 'cache'),
+        'tracking_file': os.path.join(root, 'tracking.json'),
+        'crawl_delay': 0.0,
+        'max_retries': 1,
+        'workers': 2,
+    }
+    config.update(overrides)
+    config_path = os.path.join(root, 'config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    return BOPMalagaDownloader(config_path)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_sequential_acquires_are_spaced(self):
+        limiter = RateLimiter(0.05)
+        starts = []
+        for _ in range(4):
+            limiter.acquire()
+            starts.append(time.monotonic())
+
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        for gap in gaps:
+            self.assertGreaterEqual(gap, 0.045)
+
+    def test_concurrent_acquires_reserve_distinct_slots(self):
+        limiter = RateLimiter(0.05)
+        starts = []
+        lock = threading.Lock()
+
+        def worker():
+            limiter.acquire()
+            with lock:
+                starts.append(time.monotonic())
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        starts.sort()
+        # Five slots spaced 50ms apart span at least four intervals
+        self.assertGreaterEqual(starts[-1] - starts[0], 4 * 0.045)
+
+    def test_first_acquire_does_not_wait(self):
+        limiter = RateLimiter(10.0)
+        began = time.monotonic()
+        limiter.acquire()
+        self.assertLess(time.monotonic() - began, 1.0)
+
+
+class DownloaderTestCase(unittest.TestCase):
+    """Base case providing a downloader in a scratch directory."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.downloader = make_downloader(self.root)
+
+    def tearDown(self):
+        self.downloader.db.close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+class ResumeTest(DownloaderTestCase):
+
+    def test_interrupted_body_resumes_with_range(self):
+        body = bytes(range(256)) * 4096  # 1 MiB
+        cut = 300 * 1024
+        edicto = {'id': '20250101-00001-2025-00', 'pdf_url': PDF_URL,
+                  'pdf_filename': '20250101-00001-2025-00.pdf'}
+        part_path = os.path.join(self.root, 'downloads', edicto['pdf_filename'] + '.part')
+
+        # First attempt: the body breaks partway through
+        self.downloader.session = FakeSession([
+            FakeResponse(200, {'Content-Type': 'application/pdf',
+                               'Content-Length': str(len(body))}, body, fail_after=cut),
+        ])
+        self.assertFalse(self.downloader.download_pdf(edicto))
+        self.assertEqual(os.path.getsize(part_path), cut)
+
+        # Second attempt: HEAD allows ranges, GET returns the remainder
+        session = FakeSession([
+            FakeResponse(200, {'Content-Length': str(len(body)), 'Accept-Ranges': 'bytes'}),
+            FakeResponse(206, {'Content-Type': 'application/pdf',
+                               'Content-Length': str(len(body) - cut)}, body[cut:]),
+        ])
+        self.downloader.session = session
+        self.assertTrue(self.downloader.download_pdf(edicto))
+
+        method, _, headers = session.requests[1]
+        self.assertEqual(method, 'GET')
+        self.assertEqual(headers.get('Range'), f"bytes={cut}-")
+        with open(os.path.join(self.root, 'downloads', edicto['pdf_filename']), 'rb') as f:
+            self.assertEqual(f.read(), body)
+        self.assertFalse(os.path.exists(part_path))
+
+    def test_resume_offset_rejects_servers_without_ranges(self):
+        part_path = os.path.join(self.root, 'downloads', 'x.pdf.part')
+        with open(part_path, 'wb') as f:
+            f.write(b'a' * 10)
+        self.downloader.session = FakeSession([
+            FakeResponse(200, {'Content-Length': '100'}),
+        ])
+        self.assertEqual(self.downloader._resume_offset(PDF_URL, part_path, paced=False), 0)
+
+    def test_resume_offset_returns_partial_size(self):
+        part_path = os.path.join(self.root, 'downloads', 'x.pdf.part')
+        with open(part_path, 'wb') as f:
+            f.write(b'a' * 10)
+        self.downloader.session = FakeSession([
+            FakeResponse(200, {'Content-Length': '100', 'Accept-Ranges': 'bytes'}),
+        ])
+        self.assertEqual(self.downloader._resume_offset(PDF_URL, part_path, paced=False), 10)
+
+
+
+class ResponseCleanupTest(DownloaderTestCase):
+
+    def test_make_request_closes_rejected_responses(self):
+        not_found = FakeResponse(404, {})
+        self.downloader.session = FakeSession([not_found])
+        self.assertIsNone(self.downloader.make_request(PDF_URL))
+        self.assertTrue(not_found.closed)
+
+        failed = FakeResponse(503, {})
+        self.downloader.session = FakeSession([failed])
+        self.assertIsNone(self.downloader.make_request(PDF_URL))
+        self.assertTrue(failed.closed)
+
+    def test_download_pdf_closes_response_after_failure(self):
+        response = FakeResponse(200, {'Content-Type': 'application/pdf',
+                                      'Content-Length': '100'}, b'x' * 100, fail_after=10)
+        self.downloader.session = FakeSession([response])
+        edicto = {'id': '20250101-00001-2025-00', 'pdf_url': PDF_URL,
+                  'pdf_filename': '20250101-00001-2025-00.pdf'}
+        self.assertFalse(self.downloader.download_pdf(edicto))
+        self.assertTrue(response.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Tests for the metrics collector and its per-thread shards."""
+
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import unittest
+
+from logger import (DownloadMetrics, EmailHandler, LogMetrics, MetricsCollector,
+                    _DroppingQueueHandler, _merge_metrics)
+
+
+class MergeMetricsTest(unittest.TestCase):
+
+    def test_sums_counters_onto_a_copy_of_base(self):
+        base = LogMetrics(total_logs=5, error_count=1)
+        parts = [LogMetrics(total_logs=2, error_count=1), LogMetrics(total_logs=3, info_count=3)]
+
+        merged = _merge_metrics(base, parts)
+
+        self.assertEqual(merged.total_logs, 10)
+        self.assertEqual(merged.error_count, 2)
+        self.assertEqual(merged.info_count, 3)
+        self.assertEqual(base.total_logs, 5)
+
+    def test_keeps_latest_timestamp(self):
+        base = LogMetrics(last_error_time='2025-01-02T00:00:00')
+        parts = [LogMetrics(last_error_time='2025-01-03T00:00:00'), LogMetrics()]
+
+        merged = _merge_metrics(base, parts)
+
+        self.assertEqual(merged.last_error_time, '2025-01-03T00:00:00')
+        self.assertIsNone(merged.last_critical_time)
+
+    def test_sums_float_fields(self):
+        base = DownloadMetrics(total_size_mb=1.5, successful_downloads=1)
+        parts = [DownloadMetrics(total_size_mb=2.25, successful_downloads=2)]
+
+        merged = _merge_metrics(base, parts)
+
+        self.assertAlmostEqual(merged.total_size_mb, 3.75)
+        self.assertEqual(merged.successful_downloads, 3)
+
+    def test_no_parts_returns_equal_copy(self):
+        base = DownloadMetrics(total_attempts=4, last_failed_download='2025-01-01T00:00:00')
+
+        merged = _merge_metrics(base, [])
+
+        self.assertEqual(merged, base)
+        self.assertIsNot(merged, base)
+
+
+
+class ErrorLogCompactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.metrics_file = os.path.join(self.root, 'metrics.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_short_runs_still_compact_error_log(self):
+        # Each run stays below the threshold; only the total crosses it
+        for run in range(30):
+            collector = MetricsCollector(self.metrics_file)
+            for i in range(50):
+                collector.record_log_event('ERROR', f"run {run} error {i}")
+            collector.save_metrics()
+
+        with open(collector.errors_file, 'rb') as f:
+            line_count = sum(1 for _ in f)
+        self.assertLessEqual(line_count, 10 * collector.error_history.maxlen)
+
+    def test_load_counts_every_line(self):
+        collector = MetricsCollector(self.metrics_file)
+        for i in range(150):
+            collector.record_log_event('ERROR', f"error {i}")
+
+        reloaded = MetricsCollector(self.metrics_file)
+        self.assertEqual(reloaded._error_lines, 150)
+        self.assertEqual(len(reloaded.error_history), reloaded.error_history.maxlen)
+        self.assertEqual(reloaded.error_history[-1]['message'], "error 149")
+
+
+
+class EmailQueueTest(unittest.TestCase):
+
+    def make_record(self, exc_info=None) -> logging.LogRecord:
+        return logging.LogRecord('test', logging.ERROR, __file__, 1, "failed", (), exc_info)
+
+    def test_full_queue_counts_drops(self):
+        handler = _DroppingQueueHandler(queue.Queue(maxsize=1))
+        for _ in range(3):
+            handler.handle(self.make_record())
+        self.assertEqual(handler.dropped, 2)
+
+    def test_email_includes_traceback_after_queueing(self):
+        sent = []
+
+        class Notifier:
+            def send_notification(self, subject, message, notification_type):
+                sent.append(message)
+
+        try:
+            raise RuntimeError("broken")
+        except RuntimeError as e:
+            record = self.make_record((type(e), e, e.__traceback__))
+
+        # prepare() folds the traceback into the message and clears exc_info
+        prepared = _DroppingQueueHandler(queue.Queue()).prepare(record)
+        EmailHandler(Notifier()).emit(prepared)
+
+        self.assertIsNone(prepared.exc_info)
+        self.assertEqual(sent[0].count("RuntimeError: broken"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Tests for the tracker's journal replay and snapshot compaction."""
+
+import atexit
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import tracker
+from tracker import BOPMalagaTracker
+
+
+class TrackerTestCase(unittest.TestCase):
+    """Base case providing tracker paths in a scratch directory."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.download_dir = os.path.join(self.root, 'downloads')
+        self.tracking_file = os.path.join(self.root, 'tracking.json')
+        os.makedirs(self.download_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def open_tracker(self) -> BOPMalagaTracker:
+        tracker_ = BOPMalagaTracker(self.tracking_file, self.download_dir)
+        self.addCleanup(tracker_.close)
+        return tracker_
+
+    def add_file(self, tracker_: BOPMalagaTracker, edicto_id: str, size: int = 64) -> None:
+        filename = f"{edicto_id}.pdf"
+        file_path = os.path.join(self.download_dir, filename)
+        with open(file_path, 'wb') as f:
+            f.write(b'%PDF' + b'x' * size)
+        self.assertTrue(tracker_.add_download(edicto_id, filename, file_path))
+
+    def crash(self, tracker_: BOPMalagaTracker) -> None:
+        """Drop a tracker like a killed process would, without saving."""
+        tracker_.flush()
+        atexit.unregister(tracker_.close)
+        tracker_._journal.close()
+        tracker_._journal = None
+        tracker_._dirty_count = 0
+
+
+class JournalReplayTest(TrackerTestCase):
+
+    def test_replay_skips_torn_line(self):
+        first = self.open_tracker()
+        self.add_file(first, '20250101-00001-2025-00')
+        first.save_tracking_data(force=True)
+        self.add_file(first, '20250101-00002-2025-00')
+        self.crash(first)
+
+        # An interrupted append leaves half a line, followed by a later entry
+        with open(first.journal_file, 'ab') as f:
+            f.write(b'{"op": "del", "id": "2025')
+            f.write(b'\n{"op": "del", "id": "20250101-00001-2025-00"}\n')
+
+        with self.assertLogs('BOPMalagaTracker', 'WARNING') as logs:
+            second = self.open_tracker()
+
+        self.assertTrue(any('unreadable journal entry' in line for line in logs.output))
+        self.assertFalse(second.is_downloaded('20250101-00001-2025-00'))
+        self.assertTrue(second.is_downloaded('20250101-00002-2025-00'))
+        self.assertEqual(second.get_download_record('20250101-00002-2025-00').file_size, 68)
+
+    def test_compaction_truncates_journal(self):
+        first = self.open_tracker()
+        self.add_file(first, '20250101-00001-2025-00')
+        first.save_tracking_data(force=True)
+
+        self.assertEqual(os.path.getsize(first.journal_file), 0)
+        first.close()
+
+        second = self.open_tracker()
+        self.assertTrue(second.is_downloaded('20250101-00001-2025-00'))
+
+
+@unittest.skipIf(tracker.zstandard is None, "zstandard is not installed")
+class SnapshotCompressionTest(TrackerTestCase):
+
+    def test_switches_between_plain_and_zstd_snapshots(self):
+        first = self.open_tracker()
+        self.add_file(first, '20250101-00001-2025-00')
+
+        # Every snapshot counts as large, so it is written compressed
+        with mock.patch.object(tracker, '_ZSTD_MIN_SIZE', 0):
+            first.save_tracking_data(force=True)
+        self.assertTrue(os.path.exists(first.compressed_tracking_file))
+        self.assertFalse(os.path.exists(self.tracking_file))
+        self.crash(first)
+
+        second = self.open_tracker()
+        self.assertTrue(second.is_downloaded('20250101-00001-2025-00'))
+
+        # Back under the threshold the plain file replaces the compressed one
+        self.add_file(second, '20250101-00002-2025-00')
+        second.save_tracking_data(force=True)
+        self.assertTrue(os.path.exists(self.tracking_file))
+        self.assertFalse(os.path.exists(second.compressed_tracking_file))
+        self.crash(second)
+
+        third = self.open_tracker()
+        self.assertTrue(third.is_downloaded('20250101-00001-2025-00'))
+        self.assertTrue(third.is_downloaded('20250101-00002-2025-00'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,7 @@ This module provides comprehensive tracking and storage management functionality
 for the BOP Málaga PDF downloader system. It includes:
 
 - JSON-based tracking of downloaded edicto IDs to prevent duplicates
+- Append-only journal so individual updates avoid rewriting the whole file
 - Storage cleanup functionality with configurable policies
 - File compression for older documents to save space
 - Storage threshold monitoring and automatic cleanup
@@ -24,14 +25,86 @@ Date: 2025
 
 import os
 import json
+import math
+import heapq
+import atexit
 import gzip
 import shutil
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Set, Optional, Tuple, Any
+from typing import AbstractSet, Dict, List, Set, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 import hashlib
+import mmap
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Files below this size are hashed with a plain read instead of mmap
+_MMAP_MIN_SIZE = 64 * 1024
+
+# Tracking snapshots below this size are read normally instead of mmapped
+_MMAP_LOAD_MIN_SIZE = 1024 * 1024
+
+# Serialized snapshots above this size are stored zstd-compressed
+_ZSTD_MIN_SIZE = 4 * 1024 * 1024
+_ZSTD_LEVEL = 3
+
+# Errors that mark a snapshot as corrupted rather than unreadable
+_SNAPSHOT_ERRORS = (json.JSONDecodeError, FileNotFoundError) + (
+    (zstandard.ZstdError,) if zstandard is not None else ())
+
+# File formats whose payload is already compressed
+_COMPRESSED_EXTENSIONS = frozenset({'.pdf', '.png', '.jpg', '.jpeg', '.zip', '.gz'})
+
+# Extra records selected beyond the estimate in cleanup_by_storage_limit
+_EVICTION_MARGIN = 8
+
+# Journal tuning: write buffer, entries between fsyncs, and the journal to
+# snapshot size ratio that triggers a full snapshot rewrite
+_JOURNAL_BUFFER_SIZE = 1 << 20
+_JOURNAL_SYNC_EVERY = 64
+_COMPACT_RATIO = 2
+
+
+# fdatasync skips the metadata flush where the platform provides it
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+
+def _dumps_line(entry: Dict[str, Any]) -> bytes:
+    """Serialize a journal entry as one JSON Lines record."""
+    if orjson is not None:
+        return orjson.dumps(entry) + b'\n'
+    return json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def _dumps_snapshot(data: Dict[str, Any], pretty: bool = False) -> bytes:
+    """Serialize the full tracking snapshot, compact unless pretty is set."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None)
+    if pretty:
+        return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes with orjson when available."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _is_already_compressed(path: str) -> bool:
+    """Check whether a file's format already compresses its contents."""
+    return os.path.splitext(path)[1].lower() in _COMPRESSED_EXTENSIONS
 
 
 @dataclass
@@ -44,14 +117,23 @@ class DownloadRecord:
     file_path: str
     checksum: Optional[str] = None
     compressed: bool = False
+    # Set for formats that are already compressed and so never gzipped
+    skipped_compression: bool = False
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary."""
-        return asdict(self)
+        """Convert to dictionary, without the ID that keys the record."""
+        data = asdict(self)
+        del data['edicto_id']
+        # Rarely set, so stored only when true; from_dict falls back to the default
+        if not data['skipped_compression']:
+            del data['skipped_compression']
+        return data
     
     @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'DownloadRecord':
-        """Create from dictionary."""
+    def from_dict(cls, data: Dict[str, Any], edicto_id: Optional[str] = None) -> 'DownloadRecord':
+        """Create from dictionary, taking the ID from its key when given."""
+        if edicto_id is not None:
+            data = {**data, 'edicto_id': edicto_id}
         return cls(**data)
 
 
@@ -78,16 +160,94 @@ class BOPMalagaTracker:
         """Initialize the tracking system."""
         self.tracking_file = tracking_file
         self.download_dir = download_dir
+        self._download_dir_norm = os.path.normpath(download_dir)
         self.backup_dir = os.path.join(os.path.dirname(tracking_file), 'backups')
         
+        # Large snapshots are kept zstd-compressed next to the plain path
+        self.compressed_tracking_file = f"{tracking_file}.zst"
+        self._snapshot_size = None  # Uncompressed bytes of the last snapshot
+        
+        # Append-only journal of mutations since the last snapshot
+        self.journal_file = f"{tracking_file}.jsonl"
+        self._journal = None
+        self._journal_pending = 0
+        
+        # Mutations since the last save; every _dirty_threshold adds the
+        # journal is synced and, when due, compacted into the snapshot
+        self._dirty_count = 0
+        self._dirty_threshold = 100
+        
         # Initialize logging
         self.logger = logging.getLogger('BOPMalagaTracker')
         
         # Load tracking data
         self.tracking_data = self.load_tracking_data()
         
+        # Running total of tracked bytes, kept current by every mutation
+        self._total_bytes = 0
+        
+        # 'YYYY-MM' -> {edicto_id: record}, so age-based operations only
+        # visit the months that can contain expired records
+        self._date_buckets = {}
+        
+        for edicto_id, record_data in self.tracking_data['downloads'].items():
+            self._account_record(record_data)
+            self._bucket_record(edicto_id, record_data)
+        
         # Ensure directories exist
         self._ensure_directories()
+        
+        # Persist pending changes even if the caller never saves
+        atexit.register(self.close)
+    
+    def __enter__(self) -> 'BOPMalagaTracker':
+        """Use the tracker as a context manager."""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Save pending changes on exit."""
+        self.close()
+    
+    def _account_record(self, record_data: Dict[str, Any], sign: int = 1) -> None:
+        """Add (or with sign=-1 remove) a record from the running total."""
+        self._total_bytes += record_data.get('file_size', 0) * sign
+    
+    def _bucket_record(self, edicto_id: str, record_data: Dict[str, Any]) -> None:
+        """Index a record under its download month."""
+        self._date_buckets.setdefault(record_data['download_date'][:7], {})[edicto_id] = record_data
+    
+    def _unbucket_record(self, edicto_id: str, record_data: Dict[str, Any]) -> None:
+        """Drop a record from the month index, discarding emptied months."""
+        month = record_data['download_date'][:7]
+        bucket = self._date_buckets.get(month)
+        if bucket is not None:
+            bucket.pop(edicto_id, None)
+            if not bucket:
+                del self._date_buckets[month]
+    
+    def _records_before(self, cutoff_iso: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Collect records downloaded before a cutoff from the month index."""
+        cutoff_month = cutoff_iso[:7]
+        records = []
+        for month, bucket in self._date_buckets.items():
+            if month < cutoff_month:
+                # Whole month precedes the cutoff
+                records.extend(bucket.items())
+            elif month == cutoff_month:
+                records.extend(item for item in bucket.items()
+                               if item[1]['download_date'] < cutoff_iso)
+        return records
+    
+    def close(self) -> None:
+        """Save pending changes and close the journal."""
+        atexit.unregister(self.close)
+        
+        if self._dirty_count:
+            self.save_tracking_data()
+        
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
     
     def _ensure_directories(self) -> None:
         """Ensure necessary directories exist."""
@@ -102,36 +262,161 @@ class BOPMalagaTracker:
                 Path(directory).mkdir(parents=True, exist_ok=True)
     
     def load_tracking_data(self) -> Dict[str, Any]:
+        """Load the tracking snapshot and replay the journal on top of it."""
+        data = self._load_snapshot()
+        
+        replayed = self._replay_journal(data)
+        if replayed:
+            self.logger.info(f"Replayed {replayed} journal entries from {self.journal_file}")
+        
+        return data
+    
+    def _snapshot_file(self) -> str:
+        """Get the path of the current snapshot, compressed or plain."""
+        # After an interrupted switch both may exist; either one plus the
+        # journal, which is only truncated afterwards, gives the full state
+        if os.path.exists(self.compressed_tracking_file):
+            if zstandard is None:
+                raise RuntimeError(f"{self.compressed_tracking_file} requires the "
+                                   f"zstandard package")
+            return self.compressed_tracking_file
+        return self.tracking_file
+    
+    def _load_snapshot(self) -> Dict[str, Any]:
         """Load tracking data from JSON file."""
-        if not os.path.exists(self.tracking_file):
+        snapshot_file = self._snapshot_file()
+        if not os.path.exists(snapshot_file):
             self.logger.info(f"Creating new tracking file: {self.tracking_file}")
             return self._create_empty_tracking_data()
         
         try:
-            with open(self.tracking_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(snapshot_file, 'rb') as f:
+                if snapshot_file == self.compressed_tracking_file:
+                    raw = zstandard.ZstdDecompressor().decompress(f.read())
+                    snapshot_size = len(raw)
+                    data = _loads(raw)
+                else:
+                    snapshot_size = os.fstat(f.fileno()).st_size
+                    data = self._read_json(f)
             
             # Validate and migrate data structure if needed
             data = self._validate_and_migrate_data(data)
             
             self.logger.info(f"Loaded tracking data: {len(data.get('downloads', {}))} records")
+            self._snapshot_size = snapshot_size
             return data
             
-        except (json.JSONDecodeError, FileNotFoundError) as e:
+        except _SNAPSHOT_ERRORS as e:
             self.logger.error(f"Error loading tracking data: {e}")
             # Create backup of corrupted file
-            if os.path.exists(self.tracking_file):
-                backup_name = f"corrupted_tracking_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            if os.path.exists(snapshot_file):
+                suffix = '.zst' if snapshot_file == self.compressed_tracking_file else ''
+                backup_name = (f"corrupted_tracking_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                               f".json{suffix}")
                 backup_path = os.path.join(self.backup_dir, backup_name)
-                shutil.copy2(self.tracking_file, backup_path)
+                shutil.copy2(snapshot_file, backup_path)
                 self.logger.warning(f"Corrupted tracking file backed up to: {backup_path}")
             
             return self._create_empty_tracking_data()
     
+    def _read_json(self, f) -> Any:
+        """Parse an open JSON file, mapping large files instead of reading them."""
+        if orjson is None or os.fstat(f.fileno()).st_size < _MMAP_LOAD_MIN_SIZE:
+            return _loads(f.read())
+        
+        # orjson parses straight from the mapped pages without a userland copy
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+    
+    def _replay_journal(self, data: Dict[str, Any]) -> int:
+        """Apply journaled mutations to loaded tracking data."""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return 0
+        
+        downloads = data['downloads']
+        checksum_cache = data['checksum_cache']
+        replayed = 0
+        for line in lines:
+            if not line:
+                continue
+            try:
+                entry = _loads(line)
+            except ValueError:
+                # Torn trailing write from an interrupted run
+                self.logger.warning(f"Skipping unreadable journal entry in {self.journal_file}")
+                continue
+            
+            # Entries are idempotent, so replaying over a snapshot that
+            # already contains them is harmless
+            op = entry.get('op')
+            if op == 'put':
+                record_data = self._compact_record(entry['id'], entry['record'])
+                previous = downloads.get(entry['id'])
+                if previous is not None and previous['file_path'] != record_data['file_path']:
+                    checksum_cache.pop(previous['file_path'], None)
+                downloads[entry['id']] = record_data
+                if 'cache' in entry:
+                    checksum_cache[record_data['file_path']] = entry['cache']
+            elif op == 'del':
+                previous = downloads.pop(entry['id'], None)
+                if previous is not None:
+                    checksum_cache.pop(previous['file_path'], None)
+            elif op == 'checksum':
+                checksum_cache[entry['path']] = entry['cache']
+            if 'statistics' in entry:
+                data['statistics'] = entry['statistics']
+            replayed += 1
+        
+        return replayed
+    
+    def _append_journal(self, entry: Dict[str, Any]) -> None:
+        """Append a mutation to the journal, syncing every few entries."""
+        if self._journal is None:
+            self._journal = open(self.journal_file, 'ab', buffering=_JOURNAL_BUFFER_SIZE)
+        
+        self._journal.write(_dumps_line(entry))
+        self._journal_pending += 1
+        self._dirty_count += 1
+        
+        if self._journal_pending >= _JOURNAL_SYNC_EVERY:
+            self.flush()
+    
+    def flush(self) -> None:
+        """Write pending journal entries through to disk."""
+        if self._journal is None or not self._journal_pending:
+            return
+        
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_pending = 0
+    
+    def _needs_compaction(self) -> bool:
+        """Check whether the journal has outgrown the snapshot."""
+        if self._snapshot_size is None:
+            return True
+        
+        try:
+            journal_size = os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            return False
+        
+        return journal_size > _COMPACT_RATIO * self._snapshot_size
+    
+    def _truncate_journal(self) -> None:
+        """Empty the journal once its entries are part of the snapshot."""
+        try:
+            os.truncate(self.journal_file, 0)
+        except FileNotFoundError:
+            pass
+    
     def _create_empty_tracking_data(self) -> Dict[str, Any]:
         """Create empty tracking data structure."""
         return {
-            'version': '1.0',
+            'version': '1.1',
             'created': datetime.now().isoformat(),
             'last_updated': datetime.now().isoformat(),
             'downloads': {},  # edicto_id -> DownloadRecord
@@ -140,9 +425,39 @@ class BOPMalagaTracker:
                 'total_size_mb': 0.0,
                 'last_cleanup': None,
                 'last_compression': None
-            }
+            },
+            'checksum_cache': {}  # stored file_path -> [mtime_ns, size, sha256]
         }
     
+    def _compact_record(self, edicto_id: str, record_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip a record dict down to its stored form, in place."""
+        record_data.pop('edicto_id', None)
+        
+        file_path = record_data['file_path']
+        if os.path.basename(file_path) != file_path:
+            directory, name = os.path.split(os.path.normpath(file_path))
+            if directory == self._download_dir_norm:
+                record_data['file_path'] = name
+            elif not directory:
+                # Keep bare relative names from reading back as download dir entries
+                record_data['file_path'] = os.path.join(os.curdir, name)
+        
+        if record_data.get('filename') == f"{edicto_id}.pdf":
+            del record_data['filename']
+        
+        return record_data
+    
+    def _full_path(self, stored_path: str) -> str:
+        """Resolve a stored file path against the download directory."""
+        if os.path.basename(stored_path) == stored_path:
+            return os.path.join(self.download_dir, stored_path)
+        return stored_path
+    
+    @staticmethod
+    def _record_filename(edicto_id: str, record_data: Dict[str, Any]) -> str:
+        """Get a record's filename, which is omitted when it is the default."""
+        return record_data.get('filename') or f"{edicto_id}.pdf"
+    
     def _validate_and_migrate_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Validate and migrate tracking data structure."""
         # Ensure required fields exist
@@ -160,7 +475,10 @@ class BOPMalagaTracker:
                 'last_compression': None
             }
         
-        # Migrate old format if needed
+        if 'checksum_cache' not in data:
+            data['checksum_cache'] = {}
+        
+        # Migrate old list format if needed
         if isinstance(data.get('downloads'), list):
             # Convert old list format to dict format
             old_downloads = data['downloads']
@@ -175,46 +493,101 @@ class BOPMalagaTracker:
                     'compressed': False
                 }
         
+        # Version 1.1 stores records without the ID, default filename and
+        # download directory prefix that 1.0 repeated in every entry
+        if data['version'] == '1.0':
+            for edicto_id, record_data in data['downloads'].items():
+                self._compact_record(edicto_id, record_data)
+            data['version'] = '1.1'
+        
         data['last_updated'] = datetime.now().isoformat()
         return data
     
-    def save_tracking_data(self) -> None:
-        """Save tracking data to JSON file."""
+    def save_tracking_data(self, force: bool = False) -> None:
+        """Sync the journal, rewriting the JSON snapshot when it is due."""
+        temp_file = f"{self.tracking_file}.tmp"
         try:
+            # Journaled mutations are durable once flushed; the full
+            # snapshot is only rewritten when the journal has grown large
+            self.flush()
+            self._dirty_count = 0
+            if not force and not self._needs_compaction():
+                self.logger.debug(f"Tracking journal synced to {self.journal_file}")
+                return
+            
             # Update last_updated timestamp
             self.tracking_data['last_updated'] = datetime.now().isoformat()
             
             # Create backup before saving
             self._create_backup()
             
+            # Large snapshots are compressed; repeated keys compress well
+            data = _dumps_snapshot(self.tracking_data)
+            snapshot_size = len(data)
+            target_file, stale_file = self.tracking_file, self.compressed_tracking_file
+            if zstandard is not None and snapshot_size > _ZSTD_MIN_SIZE:
+                data = zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(data)
+                target_file, stale_file = stale_file, target_file
+            
             # Save to temporary file first, then rename (atomic operation)
-            temp_file = f"{self.tracking_file}.tmp"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(self.tracking_data, f, indent=2, ensure_ascii=False)
+            temp_file = f"{target_file}.tmp"
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+                # Data must be on disk before the rename and journal truncation
+                f.flush()
+                _fdatasync(f.fileno())
             
             # Atomic rename
-            os.rename(temp_file, self.tracking_file)
+            os.rename(temp_file, target_file)
+            self._snapshot_size = snapshot_size
             
-            self.logger.debug(f"Tracking data saved to {self.tracking_file}")
+            # Drop the other representation so it cannot shadow this one
+            try:
+                os.remove(stale_file)
+            except FileNotFoundError:
+                pass
+            
+            # Snapshot now holds every journaled mutation
+            self._truncate_journal()
+            
+            self.logger.debug(f"Tracking data saved to {target_file}")
             
         except Exception as e:
             self.logger.error(f"Error saving tracking data: {e}")
             # Clean up temporary file if it exists
-            if os.path.exists(f"{self.tracking_file}.tmp"):
-                os.remove(f"{self.tracking_file}.tmp")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
             raise
     
+    def export_tracking_data(self, export_path: str) -> None:
+        """Write an indented copy of the tracking data for human inspection."""
+        with open(export_path, 'wb') as f:
+            f.write(_dumps_snapshot(self.tracking_data, pretty=True))
+        self.logger.info(f"Tracking data exported to {export_path}")
+    
     def _create_backup(self) -> None:
         """Create backup of tracking file."""
-        if not os.path.exists(self.tracking_file):
-            return
-        
         try:
+            snapshot_file = self._snapshot_file()
+            if not os.path.exists(snapshot_file):
+                return
+            
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"tracking_backup_{timestamp}.json"
+            suffix = '.zst' if snapshot_file == self.compressed_tracking_file else ''
+            backup_name = f"tracking_backup_{timestamp}.json{suffix}"
             backup_path = os.path.join(self.backup_dir, backup_name)
             
-            shutil.copy2(self.tracking_file, backup_path)
+            # Hard-link the current snapshot: saves replace the tracking file
+            # by rename, so the link keeps the old contents without a copy
+            try:
+                os.link(snapshot_file, backup_path)
+            except FileExistsError:
+                # Several saves within one second share a backup name
+                os.remove(backup_path)
+                os.link(snapshot_file, backup_path)
+            except OSError:
+                # Filesystem without hard links, or backups on another device
+                shutil.copy2(snapshot_file, backup_path)
             self.logger.debug(f"Tracking backup created: {backup_path}")
             
             # Clean up old backups (keep last 10)
@@ -226,17 +599,18 @@ class BOPMalagaTracker:
     def _cleanup_old_backups(self, keep_count: int = 10) -> None:
         """Clean up old backup files."""
         try:
-            backup_files = []
-            for file in os.listdir(self.backup_dir):
-                if file.startswith('tracking_backup_') and file.endswith('.json'):
-                    file_path = os.path.join(self.backup_dir, file)
-                    backup_files.append((file_path, os.path.getmtime(file_path)))
+            with os.scandir(self.backup_dir) as it:
+                backup_files = [(entry.path, entry.stat().st_mtime) for entry in it
+                                if entry.name.startswith('tracking_backup_')
+                                and entry.name.endswith(('.json', '.json.zst'))]
             
-            # Sort by modification time (newest first)
-            backup_files.sort(key=lambda x: x[1], reverse=True)
+            # Select only the oldest backups beyond the ones to keep
+            excess = len(backup_files) - keep_count
+            if excess <= 0:
+                return
             
             # Remove old backups
-            for file_path, _ in backup_files[keep_count:]:
+            for file_path, _ in heapq.nsmallest(excess, backup_files, key=itemgetter(1)):
                 os.remove(file_path)
                 self.logger.debug(f"Removed old backup: {file_path}")
                 
@@ -254,8 +628,10 @@ class BOPMalagaTracker:
             # Get file information
             file_size = 0
             checksum = None
+            file_stat = None
             if os.path.exists(file_path):
-                file_size = os.path.getsize(file_path)
+                file_stat = os.stat(file_path)
+                file_size = file_stat.st_size
                 checksum = self._calculate_checksum(file_path)
             
             # Create download record
@@ -270,73 +646,126 @@ class BOPMalagaTracker:
             )
             
             # Add to tracking data
-            self.tracking_data['downloads'][edicto_id] = record.to_dict()
+            record_data = self._compact_record(edicto_id, record.to_dict())
+            self.tracking_data['downloads'][edicto_id] = record_data
+            self._account_record(record_data)
+            self._bucket_record(edicto_id, record_data)
             
             # Update statistics
-            self.tracking_data['statistics']['total_downloads'] += 1
-            self.tracking_data['statistics']['total_size_mb'] += file_size / (1024 * 1024)
+            statistics = self.tracking_data['statistics']
+            statistics['total_downloads'] += 1
+            statistics['total_size_mb'] += file_size / (1024 * 1024)
+            
+            entry = {'op': 'put', 'id': edicto_id, 'record': record_data,
+                     'statistics': statistics}
+            
+            # Seed the checksum cache so the first verification can skip this file
+            if checksum:
+                cache_entry = [file_stat.st_mtime_ns, file_size, checksum]
+                self.tracking_data['checksum_cache'][record_data['file_path']] = cache_entry
+                entry['cache'] = cache_entry
+            
+            self._append_journal(entry)
             
             self.logger.info(f"Added download record: {edicto_id}")
-            return True
             
         except Exception as e:
             self.logger.error(f"Error adding download record for {edicto_id}: {e}")
             return False
+        
+        # Save in batches rather than after every add
+        if self._dirty_count >= self._dirty_threshold:
+            try:
+                self.save_tracking_data()
+            except Exception:
+                # save_tracking_data has already logged the failure
+                pass
+        
+        return True
     
     def is_downloaded(self, edicto_id: str) -> bool:
         """Check if edicto is already downloaded."""
         return edicto_id in self.tracking_data['downloads']
     
-    def get_downloaded_ids(self) -> Set[str]:
-        """Get set of all downloaded edicto IDs."""
-        return set(self.tracking_data['downloads'].keys())
+    def get_downloaded_ids(self) -> AbstractSet[str]:
+        """Get a live set view of all downloaded edicto IDs."""
+        return self.tracking_data['downloads'].keys()
     
     def get_download_record(self, edicto_id: str) -> Optional[DownloadRecord]:
         """Get download record for specific edicto."""
         record_data = self.tracking_data['downloads'].get(edicto_id)
         if record_data:
-            return DownloadRecord.from_dict(record_data)
+            return DownloadRecord.from_dict({
+                **record_data,
+                'filename': self._record_filename(edicto_id, record_data),
+                'file_path': self._full_path(record_data['file_path'])
+            }, edicto_id)
         return None
     
     def _calculate_checksum(self, file_path: str) -> str:
         """Calculate SHA-256 checksum of file."""
         try:
-            hash_sha256 = hashlib.sha256()
             with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_sha256.update(chunk)
-            return hash_sha256.hexdigest()
+                if hasattr(hashlib, 'file_digest'):
+                    return hashlib.file_digest(f, 'sha256').hexdigest()
+                
+                # Pre-3.11: small files in one read, larger ones via a
+                # single update() over an mmap of the whole file
+                hash_sha256 = hashlib.sha256()
+                if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+                    hash_sha256.update(f.read())
+                else:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        hash_sha256.update(mm)
+                return hash_sha256.hexdigest()
         except Exception as e:
             self.logger.warning(f"Error calculating checksum for {file_path}: {e}")
             return ""
     
+    def _scan_download_dir(self) -> Set[str]:
+        """List the download directory once, as a set of entry names."""
+        try:
+            with os.scandir(self.download_dir) as it:
+                return {entry.name for entry in it}
+        except FileNotFoundError:
+            return set()
+    
+    def _file_exists(self, present: Set[str], stored_path: str) -> bool:
+        """Check a stored file path against a directory scan."""
+        if os.path.basename(stored_path) == stored_path:
+            return stored_path in present
+        # Files stored outside the download directory need their own stat
+        return os.path.exists(stored_path)
+    
     def get_storage_stats(self) -> StorageStats:
         """Get current storage statistics."""
         stats = StorageStats()
         
         try:
-            download_dates = []
+            present = self._scan_download_dir()
+            oldest_date = None
+            newest_date = None
             
             for record_data in self.tracking_data['downloads'].values():
-                record = DownloadRecord.from_dict(record_data)
-                
                 # Check if file still exists
-                if os.path.exists(record.file_path):
+                if self._file_exists(present, record_data['file_path']):
                     stats.total_files += 1
-                    file_size_mb = record.file_size / (1024 * 1024)
+                    file_size_mb = record_data['file_size'] / (1024 * 1024)
                     stats.total_size_mb += file_size_mb
                     
-                    if record.compressed:
+                    if record_data.get('compressed', False):
                         stats.compressed_files += 1
                         stats.compressed_size_mb += file_size_mb
                     
-                    download_dates.append(record.download_date)
+                    # Track oldest and newest dates
+                    download_date = record_data['download_date']
+                    if oldest_date is None or download_date < oldest_date:
+                        oldest_date = download_date
+                    if newest_date is None or download_date > newest_date:
+                        newest_date = download_date
             
-            # Find oldest and newest dates
-            if download_dates:
-                download_dates.sort()
-                stats.oldest_file_date = download_dates[0]
-                stats.newest_file_date = download_dates[-1]
+            stats.oldest_file_date = oldest_date
+            stats.newest_file_date = newest_date
             
         except Exception as e:
             self.logger.error(f"Error calculating storage stats: {e}")
@@ -347,28 +776,28 @@ class BOPMalagaTracker:
         """Remove files older than specified days."""
         removed_count = 0
         removed_size_mb = 0.0
-        cutoff_date = datetime.now() - timedelta(days=max_age_days)
+        # ISO-8601 timestamps order lexicographically, so compare strings
+        cutoff_iso = (datetime.now() - timedelta(days=max_age_days)).isoformat()
         
         try:
-            to_remove = []
+            to_remove = self._records_before(cutoff_iso)
             
-            for edicto_id, record_data in self.tracking_data['downloads'].items():
-                record = DownloadRecord.from_dict(record_data)
-                download_date = datetime.fromisoformat(record.download_date.replace('Z', '+00:00'))
-                
-                if download_date < cutoff_date:
-                    to_remove.append((edicto_id, record))
-            
-            # Remove old files
-            for edicto_id, record in to_remove:
-                if os.path.exists(record.file_path):
-                    file_size_mb = os.path.getsize(record.file_path) / (1024 * 1024)
-                    os.remove(record.file_path)
-                    removed_size_mb += file_size_mb
-                    self.logger.info(f"Removed old file: {record.filename}")
+            # Remove old files, sized from the record rather than a stat
+            for edicto_id, record_data in to_remove:
+                try:
+                    os.unlink(self._full_path(record_data['file_path']))
+                except FileNotFoundError:
+                    pass
+                else:
+                    removed_size_mb += record_data['file_size'] / (1024 * 1024)
+                    self.logger.info(f"Removed old file: {self._record_filename(edicto_id, record_data)}")
                 
                 # Remove from tracking
+                self._account_record(record_data, -1)
+                self._unbucket_record(edicto_id, record_data)
+                self.tracking_data['checksum_cache'].pop(record_data['file_path'], None)
                 del self.tracking_data['downloads'][edicto_id]
+                self._append_journal({'op': 'del', 'id': edicto_id})
                 removed_count += 1
             
             # Update statistics
@@ -377,6 +806,8 @@ class BOPMalagaTracker:
             self.tracking_data['statistics']['total_size_mb'] -= removed_size_mb
             
             if removed_count > 0:
+                # A no-op run only moves last_cleanup; don't grow the journal for it
+                self._append_journal({'op': 'stats', 'statistics': self.tracking_data['statistics']})
                 self.logger.info(f"Cleanup completed: removed {removed_count} files, "
                                f"freed {removed_size_mb:.2f} MB")
             
@@ -387,6 +818,14 @@ class BOPMalagaTracker:
     
     def cleanup_by_storage_limit(self, max_storage_mb: float) -> Tuple[int, float]:
         """Remove oldest files to stay under storage limit."""
+        # Tracked bytes bound the bytes on disk, so under the limit there
+        # is no need to walk the records
+        tracked_size_mb = self._total_bytes / (1024 * 1024)
+        if tracked_size_mb <= max_storage_mb:
+            self.logger.debug(f"Storage under limit: {tracked_size_mb:.2f} MB "
+                            f"<= {max_storage_mb} MB")
+            return 0, 0.0
+        
         current_stats = self.get_storage_stats()
         
         if current_stats.total_size_mb <= max_storage_mb:
@@ -398,38 +837,58 @@ class BOPMalagaTracker:
         removed_size_mb = 0.0
         
         try:
-            # Get all records sorted by download date (oldest first)
+            # Get all records with their download dates
+            present = self._scan_download_dir()
+            downloads = self.tracking_data['downloads']
             records_with_dates = []
-            for edicto_id, record_data in self.tracking_data['downloads'].items():
-                record = DownloadRecord.from_dict(record_data)
-                if os.path.exists(record.file_path):
-                    download_date = datetime.fromisoformat(record.download_date.replace('Z', '+00:00'))
-                    records_with_dates.append((download_date, edicto_id, record))
+            for edicto_id, record_data in downloads.items():
+                if self._file_exists(present, record_data['file_path']):
+                    records_with_dates.append((record_data['download_date'], edicto_id, record_data))
             
-            records_with_dates.sort(key=lambda x: x[0])  # Sort by date
+            # Only the oldest few records are needed: estimate how many from
+            # the average file size, doubling the estimate if it falls short
+            current_size = current_stats.total_size_mb
+            avg_file_mb = current_size / max(current_stats.total_files, 1)
+            k = math.ceil((current_size - max_storage_mb) / max(avg_file_mb, 1e-9)) + _EVICTION_MARGIN
             
             # Remove oldest files until under limit
-            current_size = current_stats.total_size_mb
-            for _, edicto_id, record in records_with_dates:
-                if current_size <= max_storage_mb:
-                    break
-                
-                if os.path.exists(record.file_path):
-                    file_size_mb = os.path.getsize(record.file_path) / (1024 * 1024)
-                    os.remove(record.file_path)
-                    current_size -= file_size_mb
-                    removed_size_mb += file_size_mb
-                    self.logger.info(f"Removed for storage limit: {record.filename}")
+            while current_size > max_storage_mb:
+                for _, edicto_id, record_data in heapq.nsmallest(k, records_with_dates, key=itemgetter(0)):
+                    if current_size <= max_storage_mb:
+                        break
+                    if edicto_id not in downloads:
+                        # Already removed in a previous round
+                        continue
+                    
+                    try:
+                        os.unlink(self._full_path(record_data['file_path']))
+                    except FileNotFoundError:
+                        pass
+                    else:
+                        file_size_mb = record_data['file_size'] / (1024 * 1024)
+                        current_size -= file_size_mb
+                        removed_size_mb += file_size_mb
+                        self.logger.info(f"Removed for storage limit: "
+                                       f"{self._record_filename(edicto_id, record_data)}")
+                    
+                    # Remove from tracking
+                    self._account_record(record_data, -1)
+                    self._unbucket_record(edicto_id, record_data)
+                    self.tracking_data['checksum_cache'].pop(record_data['file_path'], None)
+                    del downloads[edicto_id]
+                    self._append_journal({'op': 'del', 'id': edicto_id})
+                    removed_count += 1
                 
-                # Remove from tracking
-                del self.tracking_data['downloads'][edicto_id]
-                removed_count += 1
+                if k >= len(records_with_dates):
+                    break
+                k *= 2
             
             # Update statistics
             self.tracking_data['statistics']['total_downloads'] -= removed_count
             self.tracking_data['statistics']['total_size_mb'] -= removed_size_mb
             
             if removed_count > 0:
+                self._append_journal({'op': 'stats', 'statistics': self.tracking_data['statistics']})
                 self.logger.info(f"Storage cleanup completed: removed {removed_count} files, "
                                f"freed {removed_size_mb:.2f} MB")
             
@@ -442,50 +901,66 @@ class BOPMalagaTracker:
         """Compress files older than specified days."""
         compressed_count = 0
         space_saved_mb = 0.0
-        cutoff_date = datetime.now() - timedelta(days=compress_age_days)
+        cutoff_iso = (datetime.now() - timedelta(days=compress_age_days)).isoformat()
         
         try:
-            for edicto_id, record_data in self.tracking_data['downloads'].items():
-                record = DownloadRecord.from_dict(record_data)
+            present = self._scan_download_dir()
+            for edicto_id, record_data in self._records_before(cutoff_iso):
+                stored_path = record_data['file_path']
+                
+                # Skip if already compressed, already judged not worth it,
+                # or the file doesn't exist
+                if (record_data.get('compressed', False)
+                        or record_data.get('skipped_compression', False)
+                        or not self._file_exists(present, stored_path)):
+                    continue
                 
-                # Skip if already compressed or file doesn't exist
-                if record.compressed or not os.path.exists(record.file_path):
+                # PDFs and similar formats are already deflated internally;
+                # gzip would burn CPU for a negligible size reduction
+                if _is_already_compressed(stored_path):
+                    record_data['skipped_compression'] = True
+                    self._append_journal({'op': 'put', 'id': edicto_id, 'record': record_data})
+                    self.logger.debug(f"Skipping compression of "
+                                    f"{self._record_filename(edicto_id, record_data)}: "
+                                    f"already compressed format")
                     continue
                 
-                download_date = datetime.fromisoformat(record.download_date.replace('Z', '+00:00'))
+                # Compress the file
+                file_path = self._full_path(stored_path)
+                compressed_path = f"{file_path}.gz"
+                original_size = os.path.getsize(file_path)
+                
+                with open(file_path, 'rb') as f_in:
+                    with gzip.open(compressed_path, 'wb', compresslevel=1) as f_out:
+                        shutil.copyfileobj(f_in, f_out)
                 
-                if download_date < cutoff_date:
-                    # Compress the file
-                    compressed_path = f"{record.file_path}.gz"
-                    original_size = os.path.getsize(record.file_path)
+                # Verify compression was successful
+                if os.path.exists(compressed_path):
+                    compressed_size = os.path.getsize(compressed_path)
+                    space_saved = (original_size - compressed_size) / (1024 * 1024)
                     
-                    with open(record.file_path, 'rb') as f_in:
-                        with gzip.open(compressed_path, 'wb') as f_out:
-                            shutil.copyfileobj(f_in, f_out)
+                    # Remove original file
+                    os.remove(file_path)
                     
-                    # Verify compression was successful
-                    if os.path.exists(compressed_path):
-                        compressed_size = os.path.getsize(compressed_path)
-                        space_saved = (original_size - compressed_size) / (1024 * 1024)
-                        
-                        # Remove original file
-                        os.remove(record.file_path)
-                        
-                        # Update record
-                        record.file_path = compressed_path
-                        record.compressed = True
-                        record.file_size = compressed_size
-                        self.tracking_data['downloads'][edicto_id] = record.to_dict()
-                        
-                        compressed_count += 1
-                        space_saved_mb += space_saved
-                        
-                        self.logger.info(f"Compressed {record.filename}: "
-                                       f"saved {space_saved:.2f} MB")
+                    # Update record in place
+                    self._account_record(record_data, -1)
+                    self.tracking_data['checksum_cache'].pop(stored_path, None)
+                    record_data['compressed'] = True
+                    record_data['file_path'] = f"{stored_path}.gz"
+                    record_data['file_size'] = compressed_size
+                    self._account_record(record_data)
+                    self._append_journal({'op': 'put', 'id': edicto_id, 'record': record_data})
+                    
+                    compressed_count += 1
+                    space_saved_mb += space_saved
+                    
+                    self.logger.info(f"Compressed {self._record_filename(edicto_id, record_data)}: "
+                                   f"saved {space_saved:.2f} MB")
             
             # Update statistics
             if compressed_count > 0:
                 self.tracking_data['statistics']['last_compression'] = datetime.now().isoformat()
+                self._append_journal({'op': 'stats', 'statistics': self.tracking_data['statistics']})
                 self.logger.info(f"Compression completed: {compressed_count} files, "
                                f"saved {space_saved_mb:.2f} MB")
             
@@ -500,24 +975,62 @@ class BOPMalagaTracker:
         corrupted_files = []
         
         try:
+            present = self._scan_download_dir()
+            checksum_cache = self.tracking_data['checksum_cache']
+            to_hash = []
             for edicto_id, record_data in self.tracking_data['downloads'].items():
-                record = DownloadRecord.from_dict(record_data)
+                file_path = record_data['file_path']
                 
-                if not os.path.exists(record.file_path):
+                if not self._file_exists(present, file_path):
                     missing_files.append(edicto_id)
-                    self.logger.warning(f"Missing file: {record.filename}")
+                    self.logger.warning(f"Missing file: {self._record_filename(edicto_id, record_data)}")
                     continue
                 
                 # Verify checksum if available
-                if record.checksum:
-                    if record.compressed and record.file_path.endswith('.gz'):
+                checksum = record_data.get('checksum')
+                if checksum:
+                    if record_data.get('compressed', False) and file_path.endswith('.gz'):
                         # For compressed files, we can't easily verify the original checksum
                         continue
                     
-                    current_checksum = self._calculate_checksum(record.file_path)
-                    if current_checksum != record.checksum:
-                        corrupted_files.append(edicto_id)
-                        self.logger.warning(f"Corrupted file detected: {record.filename}")
+                    try:
+                        file_stat = os.stat(self._full_path(file_path))
+                    except FileNotFoundError:
+                        missing_files.append(edicto_id)
+                        self.logger.warning(f"Missing file: {self._record_filename(edicto_id, record_data)}")
+                        continue
+                    
+                    # Unchanged mtime and size reuse the digest from the last hash
+                    stat_key = [file_stat.st_mtime_ns, file_stat.st_size]
+                    cached = checksum_cache.get(file_path)
+                    if cached is not None and cached[:2] == stat_key:
+                        if cached[2] != checksum:
+                            corrupted_files.append(edicto_id)
+                            self.logger.warning(f"Corrupted file detected: "
+                                              f"{self._record_filename(edicto_id, record_data)}")
+                        continue
+                    
+                    to_hash.append((edicto_id, record_data, checksum, stat_key))
+            
+            # Hash in parallel; hashlib and file reads release the GIL
+            if to_hash:
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    current_checksums = executor.map(
+                        self._calculate_checksum,
+                        [self._full_path(record_data['file_path']) for _, record_data, _, _ in to_hash])
+                    
+                    for (edicto_id, record_data, checksum, stat_key), current_checksum in zip(to_hash, current_checksums):
+                        # An empty digest means the file could not be read
+                        if current_checksum:
+                            cache_entry = stat_key + [current_checksum]
+                            checksum_cache[record_data['file_path']] = cache_entry
+                            self._append_journal({'op': 'checksum', 'path': record_data['file_path'],
+                                                  'cache': cache_entry})
+                        
+                        if current_checksum != checksum:
+                            corrupted_files.append(edicto_id)
+                            self.logger.warning(f"Corrupted file detected: "
+                                              f"{self._record_filename(edicto_id, record_data)}")
             
             if missing_files or corrupted_files:
                 self.logger.warning(f"File verification: {len(missing_files)} missing, "
@@ -573,6 +1086,8 @@ def main():
                        help='Show summary report')
     parser.add_argument('--cleanup', action='store_true',
                        help='Run cleanup operations')
+    parser.add_argument('--pretty-export', metavar='PATH',
+                       help='Write an indented copy of the tracking data to PATH')
     
     args = parser.parse_args()
     
@@ -606,6 +1121,9 @@ def main():
             report = tracker.get_summary_report()
             print(json.dumps(report, indent=2))
         
+        if args.pretty_export:
+            tracker.export_tracking_data(args.pretty_export)
+        
     except Exception as e:
         print(f"Error: {e}")
         exit(1)